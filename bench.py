@@ -0,0 +1,277 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import resource
+import socket
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+from aiohttp import web
+from crawl import AsyncCrawler, extract_page_data
+
+
+@dataclass
+class SiteConfig:
+    pages: int = 1000
+    shape: str = "random"
+    fanout: int = 10
+    page_bytes: int = 20_000
+    latency_ms: float = 10.0
+    jitter_ms: float = 5.0
+    error_rate: float = 0.0
+    seed: int = 1
+
+
+def page_links(config: SiteConfig, index: int) -> List[int]:
+    if config.shape == "tree":
+        first = index * config.fanout + 1
+        return [i for i in range(first, first + config.fanout) if i < config.pages]
+    if config.shape == "chain":
+        return [index + 1] if index + 1 < config.pages else []
+    # random graph, stable per page so every run sees the same site
+    rng = random.Random(config.seed * 1_000_003 + index)
+    return [rng.randrange(config.pages) for _ in range(config.fanout)]
+
+
+def render_page(config: SiteConfig, index: int) -> str:
+    parts = [
+        f"<html><head><title>page {index}</title></head><body>",
+        f"<h1>Page {index}</h1>",
+        f"<main><p>First paragraph of page {index}.</p>",
+    ]
+    for link in page_links(config, index):
+        parts.append(f'<a href="/page/{link}">page {link}</a>')
+    parts.append(f'<img src="/static/{index}.png" alt="image {index}">')
+
+    # pad with filler markup up to the configured page size
+    size = sum(len(part) for part in parts)
+    filler = "<div><p>Lorem ipsum dolor sit amet, consectetur adipiscing.</p></div>"
+    parts.extend(filler for _ in range(max(0, config.page_bytes - size) // len(filler)))
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def make_site(config: SiteConfig) -> web.Application:
+    rng = random.Random(config.seed)
+
+    async def page(request: web.Request) -> web.Response:
+        index = int(request.match_info.get("index", 0))
+        if index >= config.pages:
+            raise web.HTTPNotFound()
+        delay = config.latency_ms + rng.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if rng.random() < config.error_rate:
+            raise web.HTTPInternalServerError()
+        return web.Response(text=render_page(config, index), content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    app.router.add_get("/page/{index}", page)
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_site(config: SiteConfig, port: int):
+    web.run_app(make_site(config), host="127.0.0.1", port=port, print=None)
+
+
+async def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+class TimedCrawler(AsyncCrawler):
+    # records time to response headers for every fetch
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+
+    @asynccontextmanager
+    async def fetch(self, url: str, headers: Optional[dict] = None):
+        started = time.perf_counter()
+        async with super().fetch(url, headers) as res:
+            self.latencies.append(time.perf_counter() - started)
+            yield res
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def crawl_case(url: str, concurrency: int, max_pages: int, options: dict):
+    crawler = TimedCrawler(url, concurrency, max_pages, obey_robots=False, **options)
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    async with crawler:
+        await crawler.crawl()
+    elapsed = time.perf_counter() - started
+    return {
+        "pages": crawler.pages_ok,
+        "failed": crawler.pages_failed,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(crawler.pages_ok / elapsed, 1),
+        "fetch_p50_ms": round(percentile(crawler.latencies, 0.50) * 1000, 2),
+        "fetch_p99_ms": round(percentile(crawler.latencies, 0.99) * 1000, 2),
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_crawl_case(url: str, concurrency: int, max_pages: int, options: dict):
+    # runs in a fresh process so peak rss belongs to this crawl alone
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(crawl_case(url, concurrency, max_pages, options))
+
+
+def run_parse_case(config: SiteConfig, samples: int) -> dict:
+    pages = [render_page(config, i % config.pages) for i in range(samples)]
+    started = time.process_time()
+    for i, html in enumerate(pages):
+        extract_page_data(html, f"http://127.0.0.1/page/{i}")
+    cpu = time.process_time() - started
+    return {
+        "samples": samples,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_ms_per_page": round(cpu / samples * 1000, 3),
+        "pages_per_sec": round(samples / cpu, 1) if cpu else 0.0,
+    }
+
+
+def run_benchmark(args) -> dict:
+    config = SiteConfig(
+        pages=args.pages,
+        shape=args.shape,
+        fanout=args.fanout,
+        page_bytes=args.page_bytes,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    options = {}
+    if args.parse_executor:
+        options["parse_executor"] = args.parse_executor
+    if args.adaptive:
+        options["adaptive_concurrency"] = True
+
+    context = multiprocessing.get_context("spawn")
+    port = free_port()
+    server = context.Process(target=serve_site, args=(config, port), daemon=True)
+    server.start()
+    try:
+        asyncio.run(wait_for_port(port))
+        with context.Pool(1) as pool:
+            crawl = pool.apply(
+                run_crawl_case,
+                (
+                    f"http://127.0.0.1:{port}/",
+                    args.concurrency,
+                    args.max_pages,
+                    options,
+                ),
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "site": asdict(config),
+        "concurrency": args.concurrency,
+        "max_pages": args.max_pages,
+        "options": options,
+        "crawl": crawl,
+        "parse": run_parse_case(config, args.parse_samples),
+    }
+
+
+def load_results(filename: str) -> list:
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def same_case(a: dict, b: dict) -> bool:
+    keys = ("site", "concurrency", "max_pages", "options")
+    return all(a.get(key) == b.get(key) for key in keys)
+
+
+def print_result(result: dict, previous: Optional[dict]):
+    print(f"benchmark {result['label'] or ''} ({result['timestamp']})")
+    for section in ("crawl", "parse"):
+        for key, value in result[section].items():
+            line = f"  {section}.{key}: {value}"
+            if previous and isinstance(value, (int, float)):
+                before = previous[section].get(key)
+                if before:
+                    line += f" ({(value - before) / before * 100:+.1f}% vs {before})"
+            print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="benchmark the crawler")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument(
+        "--shape", choices=["random", "tree", "chain"], default="random"
+    )
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--page-bytes", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--max-pages", type=int, default=1000)
+    parser.add_argument("--parse-executor", choices=["process", "thread"])
+    parser.add_argument("--adaptive", action="store_true")
+    parser.add_argument("--parse-samples", type=int, default=200)
+    parser.add_argument("--label", default="")
+    parser.add_argument(
+        "--output",
+        default="bench_results.jsonl",
+        help="results are appended here and compared with the last same run",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = run_benchmark(args)
+    previous = [r for r in load_results(args.output) if same_case(r, result)]
+    print_result(result, previous[-1] if previous else None)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+
+class CrawlBudget:
+    # limits on a crawl besides max_pages. running out of time or bytes ends
+    # the whole crawl, in-flight pages included, a full host only stops
+    # taking pages from that host
+    def __init__(
+        self,
+        max_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_pages_per_host: Optional[int] = None,
+    ):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.max_pages_per_host = max_pages_per_host
+        self.deadline: Optional[float] = None
+        self.bytes = 0
+        self.host_pages: Dict[str, int] = {}
+        self.host_skipped = 0
+        self.reason: Optional[str] = None
+        self.exhausted = asyncio.Event()
+
+    def start(self):
+        # the clock starts with the crawl, not when the crawler is built
+        if self.max_seconds is not None:
+            self.deadline = time.monotonic() + self.max_seconds
+
+    def time_left(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stop(self, reason: str):
+        if self.reason is None:
+            self.reason = reason
+        self.exhausted.set()
+
+    def expired(self) -> bool:
+        # polled by callers that can't wait on the event
+        if self.time_left() == 0:
+            self.stop(f"reached the {self.max_seconds:g}s time limit")
+        return self.exhausted.is_set()
+
+    def add_bytes(self, size: int):
+        self.bytes += size
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            self.stop(f"downloaded {self.bytes} bytes, the limit is {self.max_bytes}")
+
+    def host_full(self, url: str) -> bool:
+        if self.max_pages_per_host is None:
+            return False
+        pages = self.host_pages.get(urlparse(url).netloc, 0)
+        return pages >= self.max_pages_per_host
+
+    def take_host_page(self, url: str) -> bool:
+        # charged when a page leaves the frontier, like max_pages
+        if self.max_pages_per_host is None:
+            return True
+        if self.host_full(url):
+            self.host_skipped += 1
+            return False
+        host = urlparse(url).netloc
+        self.host_pages[host] = self.host_pages.get(host, 0) + 1
+        return True
+
+    async def wait(self) -> str:
+        # returns once a crawl-ending budget runs out
+        try:
+            await asyncio.wait_for(self.exhausted.wait(), self.time_left())
+        except asyncio.TimeoutError:
+            self.stop(f"reached the {self.max_seconds:g}s time limit")
+        return self.reason
+
+    def summary(self) -> List[str]:
+        lines = []
+        if self.reason:
+            lines.append(f"stopped early: {self.reason}")
+        if self.host_skipped:
+            lines.append(
+                f"skipped {self.host_skipped} urls of hosts that reached "
+                f"{self.max_pages_per_host} pages"
+            )
+        return lines
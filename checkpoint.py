@@ -0,0 +1,138 @@
+import json
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+
+
+class Checkpoint:
+    # sqlite store of the frontier and finished pages, written in batches
+    def __init__(
+        self,
+        path: str,
+        seed_url: str,
+        resume: bool = False,
+        batch_size: int = 200,
+        interval: float = 5.0,
+        report_writers: Optional[list] = None,
+    ):
+        self.path = path
+        self.report_writers = report_writers or []
+        self.batch_size = batch_size
+        self.interval = interval
+        self.last_flush = time.monotonic()
+        self.scheduled: List[Tuple[str, str, int]] = []
+        self.finished: List[Tuple[str, Optional[str]]] = []
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS frontier (
+                normalized_url TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                normalized_url TEXT PRIMARY KEY,
+                record TEXT
+            );
+            """)
+        # checkpoints written before depth was tracked resume at depth 0
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(frontier)")]
+        if "depth" not in columns:
+            self.conn.execute(
+                "ALTER TABLE frontier ADD COLUMN depth INTEGER NOT NULL DEFAULT 0"
+            )
+
+        saved_seed = self.get_meta("seed_url")
+        if resume and saved_seed is not None and saved_seed != seed_url:
+            raise Exception(f"checkpoint {path} belongs to a crawl of {saved_seed}")
+        if not resume:
+            self.conn.executescript("""
+                DELETE FROM meta;
+                DELETE FROM frontier;
+                DELETE FROM pages;
+                """)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('seed_url', ?)", (seed_url,)
+        )
+        self.conn.commit()
+        if resume:
+            self.truncate_reports()
+        # rows of pages crawled before the first flush must not survive a
+        # crash either
+        self.flush()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def truncate_reports(self):
+        # rows written after the last flush belong to pages that are crawled
+        # again, cut the reports back to what the checkpoint recorded
+        for writer in self.report_writers:
+            size = self.get_meta(f"report_size:{writer.filename}")
+            if size is not None and hasattr(writer, "truncate"):
+                writer.truncate(int(size))
+
+    def load(self) -> Tuple[dict, List[Tuple[str, int]]]:
+        # finished pages (None for failures) and urls still waiting to be crawled
+        page_data = {}
+        for normalized_url, record in self.conn.execute(
+            "SELECT normalized_url, record FROM pages"
+        ):
+            page_data[normalized_url] = json.loads(record) if record else None
+
+        frontier = [
+            (url, depth)
+            for normalized_url, url, depth in self.conn.execute(
+                "SELECT normalized_url, url, depth FROM frontier"
+            )
+            if normalized_url not in page_data
+        ]
+        return page_data, frontier
+
+    def add_scheduled(self, normalized_url: str, url: str, depth: int = 0):
+        self.scheduled.append((normalized_url, url, depth))
+        self.maybe_flush()
+
+    def add_finished(self, normalized_url: str, record: Optional[dict]):
+        self.finished.append(
+            (normalized_url, json.dumps(record) if record is not None else None)
+        )
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        pending = len(self.scheduled) + len(self.finished)
+        if pending >= self.batch_size:
+            self.flush()
+        elif pending and time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        # reports are flushed first and their sizes saved with the pages, so
+        # every finished page is in the reports after a crash
+        sizes = []
+        for writer in self.report_writers:
+            writer.flush()
+            if hasattr(writer, "tell"):
+                sizes.append((f"report_size:{writer.filename}", str(writer.tell())))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", sizes)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO frontier VALUES (?, ?, ?)", self.scheduled
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?)", self.finished
+            )
+            self.conn.executemany(
+                "DELETE FROM frontier WHERE normalized_url = ?",
+                [(normalized_url,) for normalized_url, _ in self.finished],
+            )
+        self.scheduled.clear()
+        self.finished.clear()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -1,21 +1,60 @@
 import aiohttp
 import asyncio
+import codecs
+import itertools
+import queue
 import requests
-from bs4 import BeautifulSoup
-from copy import deepcopy
-from urllib.parse import urlparse, urljoin
-from typing import List, Optional
+import sys
+import threading
+import time
+from aiohttp import web
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+from typing import Dict, List, Optional
+from extract import (
+    EXTRACTORS,
+    PageExtractor,
+    default_fields,
+    extract_fields,
+    install_extractors,
+)
+from budget import CrawlBudget
+from checkpoint import Checkpoint
+from frontier import Frontier
+from http_cache import HttpCache
+from link_filter import LinkFilter
+from link_graph import LinkGraph
+from limiter import AdaptiveLimiter, parse_retry_after
+from metrics import Metrics, make_trace_config, start_metrics_server
+from retry import (
+    CircuitBreakers,
+    CircuitOpenError,
+    RetryPolicy,
+    StatusError,
+    error_reason,
+    is_retryable,
+)
+from robots import USER_AGENT, PolitenessScheduler, RobotsRules, parse_robots
+from seen_set import make_seen_set
+from page_record import PageRecord, UrlTable
+from simhash import SimHashIndex
+from urls import normalize_url
+from warc import WarcWriter
+from sitemap import MAX_SITEMAPS, SitemapEntry, SitemapParser, lastmod_boost
 
+# responses are read in chunks of this size and capped at the page limit
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024
+# the seen set holds every discovered url, not just the fetched pages, so it
+# is sized for this many urls per page budgeted (a bloom set grows past it)
+SEEN_URLS_PER_PAGE = 10
+# default ceiling of --adaptive, as a multiple of max_concurrency
+ADAPTIVE_HEADROOM = 4
 
-def normalize_url(url: str) -> str:
-    result = urlparse(url)
-    joined = result.netloc + result.path
-    normalized = joined.rstrip("/").lower()
-    return normalized
 
-
-def get_html(url: str) -> str:
-    res = requests.get(url, headers={"User-Agent": "BootCrawler/1.0"})
+def get_html(url: str, session: Optional[requests.Session] = None) -> str:
+    res = (session or requests).get(url, headers={"User-Agent": USER_AGENT}, timeout=15)
 
     if not res.ok:
         raise Exception("request failed")
@@ -28,64 +67,93 @@ def get_html(url: str) -> str:
 
 
 def get_h1_from_html(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    h1 = soup.find(name="h1")
-    if h1 is None:
-        return ""
-    return h1.get_text()
+    return extract_fields(html, "", ["h1"])["h1"]
 
 
 def get_first_paragraph_from_html(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
-    main = soup.find(name="main")
+    return extract_fields(html, "", ["first_paragraph"])["first_paragraph"]
 
-    # high priority main and paragraph
-    if main and main.p:
-        return main.p.get_text()
 
-    # low priority outside of main
-    p = soup.find(name="p")
-    return p.get_text() if p else ""
+def get_urls_from_html(html: str, base_url: str) -> List[str]:
+    return extract_fields(html, base_url, ["outgoing_links"])["outgoing_links"]
 
 
-def get_urls_from_html(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    a_list = soup.find_all(name="a")
+def get_images_from_html(html: str, base_url: str) -> List[str]:
+    return extract_fields(html, base_url, ["image_urls"])["image_urls"]
 
-    urls = []
-    for a in a_list:
-        href = a.get("href")
-        if not href:
-            continue
-        urls.append(urljoin(base_url, href))
 
-    return urls
+def extract_page_data(html: str, page_url: str) -> dict:
+    # single pass over the document fills every registered field
+    data = {"url": page_url}
+    data.update(extract_fields(html, page_url))
+    return data
 
 
-def get_images_from_html(html: str, base_url: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    img_list = soup.find_all(name="img")
+def decode_html(body: bytes, charset: Optional[str] = None) -> str:
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        # unknown charset from the server, fall back to utf-8
+        return body.decode("utf-8", errors="replace")
 
-    urls = []
-    for img in img_list:
-        src = img.get("src")
-        if not src:
-            continue
-        urls.append(urljoin(base_url, src))
 
-    return urls
+def make_decoder(charset: Optional[str] = None):
+    try:
+        return codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    except LookupError:
+        # unknown charset from the server, fall back to utf-8
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
 
 
-def extract_page_data(html: str, page_url: str) -> dict:
-    data = {}
-    data["url"] = page_url
-    data["h1"] = get_h1_from_html(html)
-    data["first_paragraph"] = get_first_paragraph_from_html(html)
-    data["outgoing_link_urls"] = get_urls_from_html(html, page_url)
-    data["image_urls"] = get_images_from_html(html, page_url)
+def extract_page_data_from_bytes(
+    body: bytes,
+    page_url: str,
+    charset: Optional[str] = None,
+    url_limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> dict:
+    # entry point for parse executors: raw bytes in, page record out
+    data = {"url": page_url}
+    data.update(extract_fields(decode_html(body, charset), page_url, fields, url_limit))
     return data
 
 
+def make_parse_executor(
+    kind: Optional[str], workers: Optional[int] = None, mp_context=None
+):
+    if not kind:
+        return None
+    if kind == "process":
+        # workers get the extractors registered when the pool is made
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=install_extractors,
+            initargs=(dict(EXTRACTORS),),
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    raise ValueError(f"unknown parse executor: {kind}")
+
+
+def raise_worker_errors(workers: List[asyncio.Task]):
+    # workers only stop by raising, e.g. when a report can't be written. the
+    # frontier would never drain without them, so fail the crawl instead
+    for task in workers:
+        if task.done() and not task.cancelled():
+            task.result()
+
+
+def check_response(res: aiohttp.ClientResponse):
+    if not res.ok:
+        retry_after = parse_retry_after(res.headers.get("Retry-After"))
+        raise StatusError(res.status, retry_after)
+
+    contentType = res.headers.get("content-type")
+    if not contentType or "text/html" not in contentType.lower():
+        raise Exception(f"response content-type invalid: {contentType}")
+
+
 def is_same_domain(url1: str, url2: str) -> bool:
     parsed1 = urlparse(url1)
     parsed2 = urlparse(url2)
@@ -101,55 +169,400 @@ def crawl_page(
 ) -> dict:
     if not current_url:
         current_url = base_url
-    if not page_data:
+    if page_data is None:
         page_data = {}
 
     # check base and current domain match (skip)
     if not is_same_domain(base_url, current_url):
         return page_data
 
-    # normalize the current url
-    normalized_current = normalize_url(current_url)
+    # single worker, no page limit, pages already in page_data are skipped
+    crawler = ThreadedCrawler(current_url, 1, sys.maxsize, obey_robots=False)
+    for normalized_url in page_data:
+        crawler.seen.add(normalized_url)
+    page_data.update(crawler.crawl())
+    return page_data
 
-    # check if the page has already been crawled (skip)
-    if normalized_current in page_data:
-        return page_data
 
-    print(f"extracting from {current_url}...")
-    try:
-        html = get_html(current_url)
-        data = extract_page_data(html, current_url)
-        page_data[normalized_current] = data
-        for url in data["outgoing_links"]:
-            crawl_page(base_url, url, page_data)
-    except Exception:
-        # mark as seen and skip
-        page_data[normalized_current] = None
-        print(f"failed extracting from {current_url}")
-        return page_data
+class ThreadedCrawler:
+    # synchronous crawler for callers that can't run an event loop: a fixed
+    # pool of threads drains one shared frontier, each thread keeping its own
+    # pooled requests.Session. max_pages and the worker count mean the same
+    # as for AsyncCrawler
+    def __init__(
+        self,
+        base_url: str | List[str],
+        max_concurrency: int,
+        max_pages: int,
+        report_writers: Optional[list] = None,
+        obey_robots: bool = True,
+        seen_set: str = "exact",
+    ):
+        self.seeds = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.base_url = self.seeds[0]
+        self.domains = {urlparse(seed).netloc for seed in self.seeds}
+        self.max_concurrency = max_concurrency
+        self.max_pages = max_pages
+        self.report_writers = report_writers or []
+        self.obey_robots = obey_robots
+        self.page_data = {}
+        self.urls = UrlTable()
+        self.seen = make_seen_set(seen_set, capacity=max_pages * SEEN_URLS_PER_PAGE)
+        self.pages_scheduled = 0
+        self.pages_ok = 0
+        self.pages_failed = 0
+        self.should_stop = False
+        self.lock = threading.Lock()
+        # (depth, seq, url): breadth-first, in discovery order within a depth
+        self.frontier: queue.PriorityQueue = queue.PriorityQueue()
+        self.seq = itertools.count()
+        self.local = threading.local()
+        self.sessions: List[requests.Session] = []
+        self.robots: dict = {}
+        self.robots_locks: Dict[str, threading.Lock] = {}
+        self.link_filter = LinkFilter(self.domains)
 
-    print(f"finished extracting from {current_url}.")
-    return page_data
+    def session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def robots_rules(self, url: str) -> RobotsRules:
+        parsed = urlparse(url)
+        host = parsed.netloc
+        with self.lock:
+            if host in self.robots:
+                return self.robots[host]
+            host_lock = self.robots_locks.setdefault(host, threading.Lock())
+        # one thread fetches a host's robots.txt, the others wait for it
+        with host_lock:
+            with self.lock:
+                if host in self.robots:
+                    return self.robots[host]
+            rules = self.fetch_robots(parsed.scheme, host)
+            with self.lock:
+                self.robots[host] = rules
+            return rules
+
+    def fetch_robots(self, scheme: str, host: str) -> RobotsRules:
+        try:
+            res = self.session().get(f"{scheme}://{host}/robots.txt", timeout=15)
+            if res.status_code >= 500:
+                rules = RobotsRules(disallow_all=True)
+            elif not res.ok:
+                rules = RobotsRules()
+            else:
+                rules = parse_robots(res.text)
+        except requests.RequestException as e:
+            print(f"failed fetching robots.txt for {host}: {str(e)}")
+            rules = RobotsRules()
+        return rules
+
+    def schedule(self, url: str, depth: int = 0) -> bool:
+        if self.should_stop or urlparse(url).netloc not in self.domains:
+            return False
+        if self.obey_robots and not self.robots_rules(url).allowed(url):
+            return False
+
+        normalized_url = normalize_url(url)
+        with self.lock:
+            if normalized_url in self.seen:
+                return False
+            self.seen.add(normalized_url)
+        self.frontier.put((depth, next(self.seq), url))
+        return True
+
+    def take_page(self) -> bool:
+        # charged when a page leaves the frontier, as in AsyncCrawler
+        with self.lock:
+            if self.pages_scheduled >= self.max_pages:
+                if not self.should_stop:
+                    print("reached maximum number of pages to crawl.")
+                self.should_stop = True
+                return False
+            self.pages_scheduled += 1
+        return True
+
+    def crawl_page(self, current_url: str, depth: int = 0) -> Optional[dict]:
+        print(f"extracting from {current_url}...")
+        try:
+            html = get_html(current_url, self.session())
+            data = extract_page_data(html, current_url)
+            with self.lock:
+                links = self.link_filter.filter(data["outgoing_links"])
+            for url in links:
+                if self.should_stop:
+                    break
+                self.schedule(url, depth + 1)
+        except Exception as e:
+            # mark as seen and skip
+            print(f"failed extracting from {current_url}: {str(e)}")
+            return None
+
+        print(f"finished extracting from {current_url}.")
+        return data
+
+    def store(self, data: Optional[dict]) -> Optional[PageRecord]:
+        return PageRecord.from_dict(self.urls, data) if data is not None else None
+
+    def finish_page(self, url: str, data: Optional[dict]):
+        with self.lock:
+            if data is not None:
+                self.pages_ok += 1
+                for writer in self.report_writers:
+                    writer.write(data)
+            else:
+                self.pages_failed += 1
+            if not self.report_writers:
+                self.page_data[normalize_url(url)] = self.store(data)
+
+    def worker(self):
+        while True:
+            depth, _, url = self.frontier.get()
+            try:
+                # None is the signal to exit once the frontier is drained
+                if url is None:
+                    return
+                if not self.take_page():
+                    continue
+                self.finish_page(url, self.crawl_page(url, depth))
+            finally:
+                self.frontier.task_done()
+
+    def crawl(self) -> dict:
+        for seed in self.link_filter.filter(self.seeds):
+            self.schedule(seed)
+
+        threads = [
+            threading.Thread(target=self.worker, daemon=True)
+            for _ in range(self.max_concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self.frontier.join()
+        finally:
+            for _ in threads:
+                self.frontier.put((float("inf"), next(self.seq), None))
+            for thread in threads:
+                thread.join()
+            for session in self.sessions:
+                session.close()
+            self.seen.close()
+        return self.page_data
+
+
+def crawl_site(url: str | List[str], max_concurrency, max_pages, **options) -> dict:
+    return ThreadedCrawler(url, max_concurrency, max_pages, **options).crawl()
 
 
 class AsyncCrawler:
-    def __init__(self, base_url: str, max_concurrency: int, max_pages: int):
-        self.base_url = base_url
-        self.base_domain = urlparse(base_url).netloc
+    def __init__(
+        self,
+        base_url: str | List[str],
+        max_concurrency: int,
+        max_pages: int,
+        parse_executor: Optional[str] = None,
+        parse_workers: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = False,
+        report_writers: Optional[list] = None,
+        adaptive_concurrency: bool = False,
+        obey_robots: bool = True,
+        min_crawl_delay: float = 0.0,
+        per_host_connections: int = 0,
+        seen_set: str = "exact",
+        bloom_error_rate: float = 0.001,
+        seen_path: Optional[str] = None,
+        max_page_bytes: int = DEFAULT_MAX_PAGE_BYTES,
+        link_budget: Optional[int] = None,
+        metrics_port: Optional[int] = None,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        near_duplicate_distance: Optional[int] = None,
+        frontier_mode: str = "priority",
+        max_depth: Optional[int] = None,
+        priority_rules: Optional[List[tuple]] = None,
+        use_sitemaps: bool = False,
+        link_graph: bool = False,
+        skip_extensions: Optional[List[str]] = None,
+        deny_patterns: Optional[List[str]] = None,
+        allow_patterns: Optional[List[str]] = None,
+        max_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_pages_per_host: Optional[int] = None,
+        archive_path: Optional[str] = None,
+        max_adaptive_concurrency: Optional[int] = None,
+    ):
+        # each seed scopes the crawl to its own domain
+        self.seeds = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.base_url = self.seeds[0]
+        self.base_domain = urlparse(self.base_url).netloc
+        self.domains = {urlparse(seed).netloc for seed in self.seeds}
         self.page_data = {}
+        # link and image urls of kept records, shared across pages
+        self.urls = UrlTable()
+        self.seen = make_seen_set(
+            seen_set,
+            capacity=max_pages * SEEN_URLS_PER_PAGE,
+            error_rate=bloom_error_rate,
+            path=seen_path,
+        )
+        self.pages_scheduled = 0
+        self.pages_ok = 0
+        self.pages_failed = 0
+        self.max_page_bytes = max_page_bytes
+        self.link_budget = link_budget
+        self.truncated_pages = 0
+        self.early_aborts = 0
         self.lock = asyncio.Lock()
         self.max_concurrency = max_concurrency
-        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        # shallow, well-linked pages are crawled first so max_pages is spent
+        # on the most valuable part of the site
+        self.frontier = Frontier(frontier_mode, priority_rules)
+        self.max_depth = max_depth
+        self.too_deep = 0
+        self.link_filter = LinkFilter(
+            self.domains,
+            skip_extensions=skip_extensions,
+            deny_patterns=deny_patterns,
+            allow_patterns=allow_patterns,
+        )
+        self.use_sitemaps = use_sitemaps
+        self.link_graph: LinkGraph | None = LinkGraph() if link_graph else None
+        self.sitemap_urls = 0
         self.session: aiohttp.ClientSession | None = None
         self.max_pages = max_pages
+        self.crawl_budget = CrawlBudget(max_seconds, max_bytes, max_pages_per_host)
         self.should_stop = False
+        self.parse_executor_kind = parse_executor
+        self.parse_workers = parse_workers
+        self.parse_executor: Executor | None = None
+        self.cache_path = cache_path
+        self.cache: HttpCache | None = None
+        self.archive_path = archive_path
+        self.archive: WarcWriter | None = None
+        # one thread, so compressed records reach the file whole and in order
+        self.archive_executor: ThreadPoolExecutor | None = None
+        self.checkpoint_path = checkpoint_path
+        self.resume = resume
+        self.checkpoint: Checkpoint | None = None
+        self.report_writers = report_writers or []
+        self.limiter: AdaptiveLimiter | None = None
+        # adaptive per-host limits start at max_concurrency and may rise to
+        # the ceiling, so there are enough workers to back the ceiling
+        self.workers = max_concurrency
+        if adaptive_concurrency:
+            ceiling = max_adaptive_concurrency or max_concurrency * ADAPTIVE_HEADROOM
+            ceiling = max(ceiling, max_concurrency)
+            self.limiter = AdaptiveLimiter(ceiling, initial=max_concurrency)
+            self.workers = ceiling
+        self.obey_robots = obey_robots
+        self.min_crawl_delay = min_crawl_delay
+        self.politeness: PolitenessScheduler | None = None
+        self.per_host_connections = per_host_connections
+        self.metrics = Metrics()
+        self.metrics_port = metrics_port
+        self.metrics_server: web.AppRunner | None = None
+        self.retry_policy = RetryPolicy(retries, retry_base_delay)
+        self.breakers = CircuitBreakers(breaker_threshold, breaker_reset)
+        # pages within this many simhash bits of an earlier page are flagged
+        # as near-duplicates and their links are not followed
+        self.fields: Optional[List[str]] = None
+        self.near_duplicates: SimHashIndex | None = None
+        if near_duplicate_distance is not None:
+            self.fields = default_fields() + ["fingerprint"]
+            self.near_duplicates = SimHashIndex(near_duplicate_distance)
+        self.duplicate_pages = 0
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        # one pooled connector for every seed: cached dns lookups and
+        # keep-alive sockets are reused across pages and sites
+        connector = aiohttp.TCPConnector(
+            limit=self.workers,
+            limit_per_host=self.per_host_connections,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=15),
+            trace_configs=[make_trace_config(self.metrics)],
+        )
+        if self.metrics_port:
+            self.metrics_server = await start_metrics_server(
+                self.metrics, self.metrics_port
+            )
+        self.parse_executor = make_parse_executor(
+            self.parse_executor_kind, self.parse_workers
+        )
+        if self.cache_path:
+            self.cache = HttpCache(self.cache_path)
+        if self.archive_path:
+            self.archive = WarcWriter(self.archive_path, append=self.resume)
+            self.archive_executor = ThreadPoolExecutor(max_workers=1)
+        if self.checkpoint_path:
+            self.checkpoint = Checkpoint(
+                self.checkpoint_path,
+                "\n".join(self.seeds),
+                resume=self.resume,
+                report_writers=self.report_writers,
+            )
+        if self.obey_robots:
+            self.politeness = PolitenessScheduler(self.request, self.min_crawl_delay)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.session.close()
+        if self.metrics_server:
+            await self.metrics_server.cleanup()
+        if self.parse_executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache:
+            print(
+                f"http cache: {self.cache.hits} revalidated, "
+                f"{self.cache.misses} fetched"
+            )
+            self.cache.close()
+        if self.archive:
+            # let queued records finish before closing the file
+            self.archive_executor.shutdown(wait=True)
+            print(f"archived {self.archive.responses} responses to {self.archive_path}")
+            self.archive.close()
+        if self.checkpoint:
+            self.checkpoint.close()
+        if self.politeness and self.politeness.disallowed:
+            print(f"skipped {self.politeness.disallowed} urls disallowed by robots.txt")
+        if self.limiter:
+            for line in self.limiter.summary():
+                print(line)
+        for line in self.breakers.summary():
+            print(line)
+        if self.truncated_pages:
+            print(
+                f"truncated {self.truncated_pages} pages at {self.max_page_bytes} bytes"
+            )
+        if self.early_aborts:
+            print(f"stopped reading {self.early_aborts} pages early")
+        if self.sitemap_urls:
+            print(f"queued {self.sitemap_urls} urls from sitemaps")
+        for line in self.link_filter.summary():
+            print(line)
+        for line in self.crawl_budget.summary():
+            print(line)
+        if self.too_deep:
+            print(f"skipped {self.too_deep} links deeper than {self.max_depth}")
+        if self.duplicate_pages:
+            print(f"skipped links of {self.duplicate_pages} near-duplicate pages")
+        self.seen.close()
 
     async def add_page_visit(self, normalized_url: str):
         # don't visit page
@@ -159,76 +572,518 @@ class AsyncCrawler:
         # acquire lock and check if page is already seen
         async with self.lock:
             # already seen
-            if normalized_url in self.page_data:
+            if normalized_url in self.seen:
                 return False
+            self.seen.add(normalized_url)
+        return True
 
-            # at max pages
-            if len(self.page_data) >= self.max_pages:
-                print("reached maximum number of pages to crawl.")
+    async def take_page(self) -> bool:
+        # the page budget is charged when a page leaves the frontier, so it
+        # goes to the best pages queued rather than the first ones found
+        async with self.lock:
+            if self.pages_scheduled >= self.max_pages:
+                if not self.should_stop:
+                    print("reached maximum number of pages to crawl.")
                 self.should_stop = True
                 return False
-
-            # reserve slot
-            self.page_data[normalized_url] = None
+            self.pages_scheduled += 1
         return True
 
-    async def get_html(self, url: str):
-        async with self.session.get(
-            url,
-            headers={"User-Agent": "BootCrawler/1.0"},
-        ) as res:
-            if not res.ok:
-                raise Exception("request failed")
+    def count_bytes(self, size: int):
+        self.metrics.inc("response_bytes_total", size)
+        self.crawl_budget.add_bytes(size)
 
-            contentType = res.headers.get("content-type")
-            if not contentType or "text/html" not in contentType.lower():
-                raise Exception(f"response content-type invalid: {contentType}")
+    def request(self, url: str, headers: Optional[dict] = None):
+        return self.session.get(
+            url,
+            headers={"User-Agent": USER_AGENT, **(headers or {})},
+        )
 
-            return await res.text()
+    @asynccontextmanager
+    async def fetch(self, url: str, headers: Optional[dict] = None):
+        # wait out the host's crawl-delay before taking a concurrency slot
+        if self.politeness:
+            await self.politeness.wait_turn(url)
 
-    async def crawl_page(self, current_url: str) -> str:
-        # check base and current domain match (skip)
-        if not is_same_domain(self.base_url, current_url):
+        if not self.limiter:
+            self.metrics.add_gauge("in_flight_requests", 1)
+            try:
+                async with self.request(url, headers) as res:
+                    yield res
+            finally:
+                self.metrics.add_gauge("in_flight_requests", -1)
             return
 
-        # normalize the current url
-        normalized_current = normalize_url(current_url)
-        if not await self.add_page_visit(normalized_current):
-            return
+        # hold a per-host slot for the whole request and report the outcome
+        async with self.limiter.slot(url) as slot:
+            self.metrics.add_gauge("in_flight_requests", 1)
+            try:
+                async with self.request(url, headers) as res:
+                    slot.observe(res.status, res.headers.get("Retry-After"))
+                    self.metrics.set_gauge(
+                        "concurrency_limit",
+                        slot.host_limit.limit,
+                        {"host": slot.host_limit.host},
+                    )
+                    yield res
+            finally:
+                self.metrics.add_gauge("in_flight_requests", -1)
+
+    async def read_body(self, res: aiohttp.ClientResponse) -> tuple[bytes, bool]:
+        # read in chunks and stop at the size cap instead of buffering
+        # whatever the server sends. a body of exactly the cap is complete,
+        # it is only truncated once data arrives past it
+        started = time.perf_counter()
+        body = bytearray()
+        truncated = False
+        async for chunk in res.content.iter_chunked(READ_CHUNK_SIZE):
+            self.count_bytes(len(chunk))
+            body += chunk
+            if len(body) > self.max_page_bytes:
+                self.truncated_pages += 1
+                truncated = True
+                del body[self.max_page_bytes :]
+                break
+        self.metrics.observe("body_seconds", time.perf_counter() - started)
+        return bytes(body), truncated
+
+    async def parse_stream(self, res: aiohttp.ClientResponse, url: str) -> dict:
+        # parse chunks as they arrive and stop reading once every field is
+        # final, the link budget is spent or the size cap is hit
+        started = time.perf_counter()
+        parsing = 0.0
+        decoder = make_decoder(res.charset)
+        parser = PageExtractor(url, self.fields, self.link_budget)
+        received = 0
+        async for chunk in res.content.iter_chunked(READ_CHUNK_SIZE):
+            self.count_bytes(len(chunk))
+            parse_started = time.perf_counter()
+            received += len(chunk)
+            if received > self.max_page_bytes:
+                self.truncated_pages += 1
+                chunk = chunk[: len(chunk) - (received - self.max_page_bytes)]
+                parser.feed(decoder.decode(chunk))
+                parsing += time.perf_counter() - parse_started
+                break
+            parser.feed(decoder.decode(chunk))
+            parsing += time.perf_counter() - parse_started
+            if parser.done():
+                self.early_aborts += 1
+                break
+        else:
+            parser.feed(decoder.decode(b"", final=True))
+
+        parse_started = time.perf_counter()
+        parser.close()
+        data = {"url": url, **parser.results()}
+        parsing += time.perf_counter() - parse_started
+
+        # time spent waiting on the network vs parsing what arrived
+        self.metrics.observe("parse_seconds", parsing)
+        self.metrics.observe("body_seconds", time.perf_counter() - started - parsing)
+        return data
+
+    async def get_body(self, url: str) -> tuple[bytes, str | None]:
+        async with self.fetch(url) as res:
+            check_response(res)
+            body, _ = await self.read_body(res)
+            return body, res.charset
+
+    async def get_html(self, url: str) -> str:
+        body, charset = await self.get_body(url)
+        return decode_html(body, charset)
+
+    async def extract(self, body: bytes, charset: str | None, url: str) -> dict:
+        # hand the raw bytes to the parse executor so the event loop keeps
+        # serving fetches while pages are parsed
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(
+            self.parse_executor,
+            extract_page_data_from_bytes,
+            body,
+            url,
+            charset,
+            self.link_budget,
+            self.fields,
+        )
+        self.metrics.observe("parse_seconds", time.perf_counter() - started)
+        return data
+
+    async def get_page(self, url: str) -> dict:
+        normalized_url = normalize_url(url)
+        cached = self.cache.get(normalized_url) if self.cache else None
+        headers = cached.conditional_headers() if cached else None
+
+        async with self.fetch(url, headers) as res:
+            # unchanged since the last crawl, reuse the cached extraction
+            if res.status == 304 and cached:
+                self.cache.hits += 1
+                self.metrics.inc("cache_revalidated_total")
+                return cached.record
+
+            check_response(res)
+            etag = res.headers.get("ETag")
+            last_modified = res.headers.get("Last-Modified")
+            # the archive needs the whole body, so no early stop while parsing
+            if self.parse_executor or self.archive:
+                body, truncated = await self.read_body(res)
+                charset = res.charset
+            else:
+                data = await self.parse_stream(res, url)
+
+        # leaving the response context above releases the connection before
+        # the executor parses the body
+        if self.archive:
+            # compressing and writing the record would stall every fetch
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self.archive_executor,
+                self.archive.write_response,
+                url,
+                res.status,
+                res.reason,
+                res.headers,
+                body,
+                truncated,
+            )
+        if self.parse_executor:
+            data = await self.extract(body, charset, url)
+        elif self.archive:
+            data = extract_page_data_from_bytes(
+                body, url, charset, self.link_budget, self.fields
+            )
+        if self.cache:
+            self.cache.misses += 1
+            self.cache.put(normalized_url, etag, last_modified, data)
+        return data
+
+    async def get_page_with_retries(self, url: str) -> dict:
+        breaker = self.breakers.for_url(url)
+        attempt = 0
+        while True:
+            # don't spend a worker on a host that keeps failing
+            if not breaker.allow():
+                self.metrics.inc("circuit_rejected_total")
+                raise CircuitOpenError(f"circuit open for {breaker.host}")
+            try:
+                data = await self.get_page(url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # the host answered, only this page is bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                if attempt >= self.retry_policy.retries:
+                    raise
+                retry_after = getattr(e, "retry_after", 0.0)
+                if self.retry_policy.waits_too_long(retry_after):
+                    # don't park a worker for hours, drop the page and stop
+                    # sending the host anything until the breaker resets
+                    breaker.trip()
+                    print(f"giving up on {url}: retry-after {retry_after:.0f}s")
+                    raise
+                delay = self.retry_policy.delay(attempt, retry_after)
+                self.metrics.inc("retries_total", labels={"reason": error_reason(e)})
+                print(f"retrying {url} in {delay:.2f}s: {error_reason(e)}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            breaker.record_success()
+            return data
+
+    def is_near_duplicate(self, url: str, data: dict) -> bool:
+        # cached records from a crawl without fingerprints and pages with too
+        # little text can't be checked
+        if self.near_duplicates is None or data.get("fingerprint") is None:
+            return False
+        original = self.near_duplicates.check(data["fingerprint"], url)
+        if original is None:
+            return False
+        # keep the page in the report, but its links were already reachable
+        # from the original
+        data["duplicate_of"] = original
+        self.duplicate_pages += 1
+        self.metrics.inc("near_duplicates_total")
+        print(f"{url} is a near-duplicate of {original}")
+        return True
+
+    def in_scope(self, url: str) -> bool:
+        return urlparse(url).netloc in self.domains
+
+    async def schedule(self, url: str, depth: int = 0, boost: float = 0.0) -> bool:
+        # check url is inside one of the seed domains (skip)
+        if not self.in_scope(url):
+            return False
+        if self.crawl_budget.host_full(url):
+            self.crawl_budget.host_skipped += 1
+            return False
+
+        # another link to a page that is still waiting raises its priority
+        normalized_url = normalize_url(url)
+        if self.frontier.add_inbound(normalized_url):
+            return False
+
+        if self.max_depth is not None and depth > self.max_depth:
+            self.too_deep += 1
+            return False
+
+        # check robots.txt before spending any of the page budget. disallowed
+        # urls are marked seen, so they are looked up and counted only once
+        if normalized_url in self.seen:
+            return False
+        if self.politeness and not await self.politeness.allowed(url):
+            if self.seen.add(normalized_url):
+                self.politeness.disallowed += 1
+            return False
+
+        # mark the page seen before it enters the frontier
+        if not await self.add_page_visit(normalized_url):
+            return False
+
+        self.frontier.put_nowait(url, depth, normalized_url, boost)
+        if self.checkpoint:
+            self.checkpoint.add_scheduled(normalized_url, url, depth)
+        return True
 
+    async def crawl_page(self, current_url: str, depth: int = 0) -> Optional[dict]:
         print(f"extracting from {current_url}...")
         try:
-            async with self.semaphore:
-                html = await self.get_html(current_url)
-            data = extract_page_data(html, current_url)
+            data = await self.get_page_with_retries(current_url)
 
-            # wait to update page data
-            async with self.lock:
-                self.page_data[normalized_current] = data
-
-            # start and wait for tasks to crawl to new pages
-            tasks = []
-            for url in data["outgoing_link_urls"]:
-                task = asyncio.create_task(self.crawl_page(url))
-                tasks.append(task)
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # push new pages onto the frontier for the workers
+            links = []
+            if not self.is_near_duplicate(current_url, data):
+                links = self.filter_links(data["outgoing_links"])
+            for url in links:
+                if self.should_stop:
+                    break
+                await self.schedule(url, depth + 1)
         except asyncio.CancelledError:
             print(f"cancelled crawling {current_url}")
             raise
         except Exception as e:
             # mark as seen and skip
-            self.page_data[normalized_current] = None
             print(f"failed extracting from {current_url}: {str(e)}")
+            return None
 
         print(f"finished extracting from {current_url}.")
+        return data
+
+    def filter_links(self, links: List[str]) -> List[str]:
+        before = dict(self.link_filter.dropped)
+        kept = self.link_filter.filter(links)
+        for stage, count in self.link_filter.dropped.items():
+            if count != before[stage]:
+                self.metrics.inc(
+                    "links_filtered_total",
+                    count - before[stage],
+                    labels={"stage": stage},
+                )
+        return kept
+
+    def filter_seeds(self) -> List[str]:
+        seeds = self.filter_links(self.seeds)
+        for seed in self.seeds:
+            if seed not in seeds:
+                print(f"seed {seed} is excluded by the link filters")
+        return seeds
+
+    def store(self, data: Optional[dict]) -> Optional[PageRecord]:
+        return PageRecord.from_dict(self.urls, data) if data is not None else None
+
+    def finish_page(self, url: str, data: Optional[dict]):
+        normalized_url = normalize_url(url)
+        self.metrics.inc(
+            "pages_total", labels={"result": "ok" if data is not None else "failed"}
+        )
+        if data is not None:
+            self.pages_ok += 1
+            for writer in self.report_writers:
+                writer.write(data)
+        else:
+            self.pages_failed += 1
+        if self.checkpoint:
+            self.checkpoint.add_finished(normalized_url, data)
+        if self.link_graph is not None:
+            self.add_to_link_graph(normalized_url, data)
+
+        # records already streamed to a report are not kept in memory
+        if not self.report_writers:
+            self.page_data[normalized_url] = self.store(data)
+
+    def add_to_link_graph(self, normalized_url: str, data: Optional[dict]):
+        # only in-scope links, the graph is about the crawled site
+        if data is None:
+            self.link_graph.add_page(normalized_url, None, [], ok=False)
+            return
+        links = (
+            normalize_url(url) for url in data["outgoing_links"] if self.in_scope(url)
+        )
+        self.link_graph.add_page(normalized_url, data["url"], links)
+
+    def annotate_reports(self):
+        # graph metrics need the whole crawl, so they are added to the
+        # records and reports once it is over
+        metrics = self.link_graph.page_metrics()
+        for line in self.link_graph.summary(metrics):
+            print(line)
+        for data in self.page_data.values():
+            if data is not None and data["url"] in metrics:
+                data.update(metrics[data["url"]])
+        for writer in self.report_writers:
+            if hasattr(writer, "annotate"):
+                writer.annotate(metrics)
+
+    async def worker(self):
+        while True:
+            url, depth = await self.frontier.get()
+            try:
+                # once the budget is spent the rest of the frontier is dropped
+                if not self.crawl_budget.take_host_page(url):
+                    continue
+                if not await self.take_page():
+                    continue
+                data = await self.crawl_page(url, depth)
+                self.finish_page(url, data)
+            finally:
+                self.frontier.task_done()
+
+    def restore(self) -> bool:
+        # reload finished pages and requeue the unfinished frontier
+        page_data, frontier = self.checkpoint.load()
+        if not page_data and not frontier:
+            return False
+
+        print(f"resuming crawl: {len(page_data)} pages done, {len(frontier)} queued")
+        for normalized_url, data in page_data.items():
+            self.seen.add(normalized_url)
+            if self.link_graph is not None:
+                self.add_to_link_graph(normalized_url, data)
+            if data is not None:
+                self.pages_ok += 1
+            else:
+                self.pages_failed += 1
+        if not self.report_writers:
+            self.page_data = {
+                normalized_url: self.store(data)
+                for normalized_url, data in page_data.items()
+            }
+        for url, depth in frontier:
+            normalized_url = normalize_url(url)
+            self.seen.add(normalized_url)
+            self.frontier.put_nowait(url, depth, normalized_url)
+        self.pages_scheduled = len(page_data)
+        return True
+
+    async def read_sitemap(self, url: str) -> List[str]:
+        # streams a sitemap straight into the frontier, returns the child
+        # sitemaps when it is a sitemap index
+        children = []
+        parser = SitemapParser()
+        async with self.fetch(url) as res:
+            if not res.ok:
+                raise StatusError(res.status)
+            async for chunk in res.content.iter_chunked(READ_CHUNK_SIZE):
+                self.count_bytes(len(chunk))
+                if await self.schedule_entries(parser.feed(chunk), children):
+                    return children
+        await self.schedule_entries(parser.close(), children)
+        return children
+
+    async def schedule_entries(
+        self, entries: List[SitemapEntry], children: List[str]
+    ) -> bool:
+        # the page urls of each parsed chunk go through the link filters as a
+        # batch, like the links of a page
+        lastmods = {}
+        for entry in entries:
+            if entry.is_index:
+                children.append(entry.url)
+            else:
+                lastmods.setdefault(entry.url, entry.lastmod)
+        for url in self.filter_links(list(lastmods)):
+            if await self.schedule_from_sitemap(url, lastmods[url]):
+                return True
+        return False
+
+    async def schedule_from_sitemap(self, url: str, lastmod: Optional[str]) -> bool:
+        # true once there is no point reading further: queuing more urls than
+        # the page budget can't change what gets crawled by much
+        if await self.schedule(url, 1, lastmod_boost(lastmod)):
+            self.sitemap_urls += 1
+            self.metrics.inc("sitemap_urls_total")
+        return self.should_stop or self.sitemap_urls >= self.max_pages
+
+    async def load_sitemaps(self):
+        # sitemaps listed in robots.txt, or the conventional /sitemap.xml
+        pending = []
+        for seed in self.seeds:
+            rules = await self.politeness.get_rules(seed) if self.politeness else None
+            if rules and rules.sitemaps:
+                pending.extend(rules.sitemaps)
+            else:
+                parsed = urlparse(seed)
+                pending.append(f"{parsed.scheme}://{parsed.netloc}/sitemap.xml")
+
+        read = set()
+        while pending and len(read) < MAX_SITEMAPS:
+            if self.should_stop or self.sitemap_urls >= self.max_pages:
+                break
+            url = pending.pop()
+            if url in read:
+                continue
+            read.add(url)
+            print(f"reading sitemap {url}...")
+            try:
+                pending.extend(reversed(await self.read_sitemap(url)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"failed reading sitemap {url}: {str(e)}")
+
+    async def drain(self):
+        # workers start on sitemap urls while the rest is still streaming
+        if self.use_sitemaps:
+            await self.load_sitemaps()
+        await self.frontier.join()
 
     async def crawl(self) -> dict:
-        await self.crawl_page(self.base_url)
-        # read when safe, and return copy
-        async with self.lock:
-            return deepcopy(self.page_data)
+        if self.link_graph is not None:
+            for seed in self.seeds:
+                self.link_graph.add_seed(normalize_url(seed))
+        if not (self.checkpoint and self.resume and self.restore()):
+            for seed in self.filter_seeds():
+                await self.schedule(seed)
+
+        # a fixed pool of workers drains the frontier until it is empty, or
+        # until time or bytes run out and whatever is in flight is cancelled
+        self.crawl_budget.start()
+        workers = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        drain = asyncio.create_task(self.drain())
+        budget = asyncio.create_task(self.crawl_budget.wait())
+        tasks = workers + [drain, budget]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            raise_worker_errors(workers)
+            if drain.done():
+                drain.result()
+            else:
+                print(f"stopping crawl: {budget.result()}")
+                self.should_stop = True
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # workers are done, nothing else touches page data now
+        if self.link_graph is not None:
+            self.annotate_reports()
+        return self.page_data
 
 
-async def crawl_site_async(url: str, max_concurrency, max_pages):
-    async with AsyncCrawler(url, max_concurrency, max_pages) as crawler:
+async def crawl_site_async(url: str | List[str], max_concurrency, max_pages, **options):
+    async with AsyncCrawler(url, max_concurrency, max_pages, **options) as crawler:
         return await crawler.crawl()
@@ -1,28 +1,89 @@
 import csv
+import os
+from collections.abc import Mapping
+from typing import Dict
+
+FIELDNAMES = [
+    "page_url",
+    "h1",
+    "first_paragraph",
+    "outgoing_link_urls",
+    "image_urls",
+    "duplicate_of",
+]
+
+
+def csv_row(data: dict) -> dict:
+    return {
+        "page_url": data["url"],
+        "h1": data["h1"],
+        "first_paragraph": data["first_paragraph"],
+        "outgoing_link_urls": ";".join(data["outgoing_links"]),
+        "image_urls": ";".join(data["image_urls"]),
+        "duplicate_of": data.get("duplicate_of", ""),
+    }
+
+
+class CsvReportWriter:
+    # appends one row per page as soon as it is extracted
+    def __init__(self, filename: str, append: bool = False, flush_every: int = 50):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.unflushed = 0
+        write_header = not (append and os.path.exists(filename))
+        self.file = open(filename, "a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        if write_header:
+            self.writer.writeheader()
+            print("wrote headers")
+
+    def write(self, data: dict):
+        self.writer.writerow(csv_row(data))
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.unflushed = 0
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def truncate(self, size: int):
+        # drops whatever was written after size, including a torn last line
+        self.file.truncate(size)
+
+    def annotate(self, columns: Dict[str, dict]):
+        # adds per-page columns computed after the crawl by rewriting the
+        # report row by row, keyed by page url
+        self.file.close()
+        extra = list(next(iter(columns.values()), {}))
+        temp_filename = self.filename + ".tmp"
+        with open(self.filename, newline="", encoding="utf-8") as src:
+            reader = csv.DictReader(src)
+            fieldnames = list(reader.fieldnames or FIELDNAMES)
+            fieldnames += [name for name in extra if name not in fieldnames]
+            with open(temp_filename, "w", newline="", encoding="utf-8") as dst:
+                writer = csv.DictWriter(dst, fieldnames=fieldnames)
+                writer.writeheader()
+                for row in reader:
+                    row.update(columns.get(row["page_url"], {}))
+                    writer.writerow(row)
+        os.replace(temp_filename, self.filename)
+        self.file = open(self.filename, "a", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
+
+    def close(self):
+        self.file.close()
 
 
 def write_csv_report(page_data: dict, filename: str = "report.csv"):
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        fieldnames = [
-            "page_url",
-            "h1",
-            "first_paragraph",
-            "outgoing_link_urls",
-            "image_urls",
-        ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-
-        writer.writeheader()
-        print("wrote headers")
+    writer = CsvReportWriter(filename)
+    try:
         for data in page_data.values():
-            if not isinstance(data, dict):
+            if not isinstance(data, Mapping):
                 continue
-            writer.writerow(
-                {
-                    "page_url": data["url"],
-                    "h1": data["h1"],
-                    "first_paragraph": data["first_paragraph"],
-                    "outgoing_link_urls": ";".join(data["outgoing_link_urls"]),
-                    "image_urls": ";".join(data["image_urls"]),
-                }
-            )
+            writer.write(data)
+    finally:
+        writer.close()
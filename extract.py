@@ -0,0 +1,285 @@
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+from simhash import page_fingerprint
+
+Attrs = List[Tuple[str, Optional[str]]]
+
+# tags whose text is never part of get_text() output
+SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+
+class FieldExtractor:
+    # name of the field this extractor fills in the page record
+    field = ""
+    # parsing can only stop early once every required field is done
+    required = True
+    # filled in when no explicit field list is asked for
+    default = True
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def start(self, tag: str, attrs: Attrs):
+        pass
+
+    def end(self, tag: str):
+        pass
+
+    def data(self, text: str):
+        pass
+
+    def result(self):
+        return None
+
+    # true once later markup can no longer change the result
+    def done(self) -> bool:
+        return False
+
+
+class TextOfFirstTag(FieldExtractor):
+    # collects the text of the first matching tag, including nested tags
+    tag = ""
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.depth = 0
+        self.found = False
+        self.parts: List[str] = []
+
+    def start(self, tag: str, attrs: Attrs):
+        if tag != self.tag:
+            return
+        if self.depth:
+            self.depth += 1
+        elif not self.found:
+            self.found = True
+            self.depth = 1
+
+    def end(self, tag: str):
+        if tag == self.tag and self.depth:
+            self.depth -= 1
+
+    def data(self, text: str):
+        if self.depth:
+            self.parts.append(text)
+
+    def result(self) -> str:
+        return "".join(self.parts)
+
+    def done(self) -> bool:
+        return self.found and not self.depth
+
+
+class H1Extractor(TextOfFirstTag):
+    field = "h1"
+    tag = "h1"
+
+
+class _FirstParagraph(TextOfFirstTag):
+    tag = "p"
+
+
+class FirstParagraphExtractor(FieldExtractor):
+    field = "first_paragraph"
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        # first <p> inside the first <main> (high priority)
+        self.main_depth = 0
+        self.main_seen = False
+        self.main_closed = False
+        self.main_p = _FirstParagraph(base_url)
+        # first <p> anywhere (low priority)
+        self.any_p = _FirstParagraph(base_url)
+
+    def start(self, tag: str, attrs: Attrs):
+        if tag == "main":
+            if self.main_depth:
+                self.main_depth += 1
+            elif not self.main_seen:
+                self.main_seen = True
+                self.main_depth = 1
+        if self.main_depth:
+            self.main_p.start(tag, attrs)
+        self.any_p.start(tag, attrs)
+
+    def end(self, tag: str):
+        if self.main_depth:
+            self.main_p.end(tag)
+        self.any_p.end(tag)
+        if tag == "main" and self.main_depth:
+            self.main_depth -= 1
+            self.main_closed = not self.main_depth
+
+    def data(self, text: str):
+        self.main_p.data(text)
+        self.any_p.data(text)
+
+    def result(self) -> str:
+        if self.main_p.found:
+            return self.main_p.result()
+        return self.any_p.result()
+
+    def done(self) -> bool:
+        if self.main_p.done():
+            return True
+        # the first <main> had no paragraph, so the first <p> anywhere wins
+        return self.main_closed and not self.main_p.found and self.any_p.done()
+
+
+class AttrUrlExtractor(FieldExtractor):
+    # collects absolute urls from an attribute of every matching tag
+    tag = ""
+    attr = ""
+    # stop collecting after this many urls (None for no limit)
+    limit: Optional[int] = None
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.urls: List[str] = []
+
+    def start(self, tag: str, attrs: Attrs):
+        if tag != self.tag or self.done():
+            return
+        for name, value in attrs:
+            if name == self.attr:
+                if value:
+                    self.urls.append(urljoin(self.base_url, value))
+                return
+
+    def result(self) -> List[str]:
+        return self.urls
+
+    def done(self) -> bool:
+        return self.limit is not None and len(self.urls) >= self.limit
+
+
+class LinkExtractor(AttrUrlExtractor):
+    field = "outgoing_links"
+    tag = "a"
+    attr = "href"
+
+
+class ImageExtractor(AttrUrlExtractor):
+    field = "image_urls"
+    tag = "img"
+    attr = "src"
+    required = False
+
+
+class FingerprintExtractor(FieldExtractor):
+    # simhash of the visible text, used to spot near-duplicate pages
+    field = "fingerprint"
+    # needs the whole text, a fingerprint of the part read before an early
+    # stop would match unrelated pages with the same header
+    default = False
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.parts: List[str] = []
+
+    def data(self, text: str):
+        self.parts.append(text)
+
+    def result(self) -> Optional[int]:
+        return page_fingerprint(" ".join(self.parts))
+
+
+ExtractorFactory = Callable[[str], FieldExtractor]
+
+# registered extractors, in the order their fields appear in a page record;
+# ones marked default = False only run when their field is asked for
+EXTRACTORS: Dict[str, ExtractorFactory] = {
+    "h1": H1Extractor,
+    "first_paragraph": FirstParagraphExtractor,
+    "outgoing_links": LinkExtractor,
+    "image_urls": ImageExtractor,
+    "fingerprint": FingerprintExtractor,
+}
+
+
+def register_extractor(field: str, factory: ExtractorFactory):
+    EXTRACTORS[field] = factory
+
+
+def unregister_extractor(field: str):
+    EXTRACTORS.pop(field, None)
+
+
+def install_extractors(extractors: Dict[str, ExtractorFactory]):
+    # process pool initializer: spawn and forkserver workers start from a
+    # fresh import, so extractors registered at runtime are handed over
+    EXTRACTORS.clear()
+    EXTRACTORS.update(extractors)
+
+
+def default_fields() -> List[str]:
+    return [
+        field
+        for field, factory in EXTRACTORS.items()
+        if getattr(factory, "default", True)
+    ]
+
+
+# walks a document once and feeds every event to each field extractor
+class PageExtractor(HTMLParser):
+    def __init__(
+        self,
+        base_url: str,
+        fields: Optional[Iterable[str]] = None,
+        url_limit: Optional[int] = None,
+    ):
+        super().__init__(convert_charrefs=True)
+        if fields is None:
+            fields = default_fields()
+        self.extractors = [EXTRACTORS[field](base_url) for field in fields]
+        self.skip_depth = 0
+        if url_limit is not None:
+            for extractor in self.extractors:
+                if isinstance(extractor, AttrUrlExtractor):
+                    extractor.limit = url_limit
+
+    def handle_starttag(self, tag: str, attrs: Attrs):
+        if tag in SKIP_TEXT_TAGS:
+            self.skip_depth += 1
+        for extractor in self.extractors:
+            extractor.start(tag, attrs)
+
+    def handle_startendtag(self, tag: str, attrs: Attrs):
+        for extractor in self.extractors:
+            extractor.start(tag, attrs)
+            extractor.end(tag)
+
+    def handle_endtag(self, tag: str):
+        if tag in SKIP_TEXT_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        for extractor in self.extractors:
+            extractor.end(tag)
+
+    def handle_data(self, data: str):
+        if self.skip_depth:
+            return
+        for extractor in self.extractors:
+            extractor.data(data)
+
+    def done(self) -> bool:
+        # every required field is final, the rest of the document can be skipped
+        return all(
+            extractor.done() for extractor in self.extractors if extractor.required
+        )
+
+    def results(self) -> dict:
+        return {extractor.field: extractor.result() for extractor in self.extractors}
+
+
+def extract_fields(
+    html: str,
+    base_url: str,
+    fields: Optional[Iterable[str]] = None,
+    url_limit: Optional[int] = None,
+) -> dict:
+    parser = PageExtractor(base_url, fields, url_limit)
+    parser.feed(html)
+    parser.close()
+    return parser.results()
@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+FRONTIER_MODES = ("priority", "bfs")
+
+
+def parse_priority_rule(rule: str) -> Tuple[str, float]:
+    # "PATTERN=BOOST", the pattern itself may contain "="
+    pattern, sep, boost = rule.rpartition("=")
+    if not sep or not pattern:
+        raise ValueError(f"priority rule must look like PATTERN=BOOST: {rule}")
+    return pattern, float(boost)
+
+
+class Frontier:
+    # heap of queued urls with the best score first. asyncio.Queue's
+    # get/task_done/join protocol is kept so workers drain it the same way.
+    # a queued url whose inbound count rises is pushed again with its new
+    # score and the stale entry is skipped when it reaches the top
+    def __init__(
+        self,
+        mode: str = "priority",
+        rules: Optional[List[Tuple[str, float]]] = None,
+        inbound_weight: float = 0.5,
+    ):
+        if mode not in FRONTIER_MODES:
+            raise ValueError(f"unknown frontier mode: {mode}")
+        self.mode = mode
+        self.rules = [(re.compile(pattern), boost) for pattern, boost in rules or []]
+        self.inbound_weight = inbound_weight
+        # entries are [score, seq, url, depth, inbound, boost, key], key is None
+        # once the entry is stale
+        self.heap: List[list] = []
+        self.queued: Dict[str, list] = {}
+        self.seq = itertools.count()
+        self.unfinished = 0
+        self.not_empty = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.finished.set()
+
+    def __len__(self) -> int:
+        return len(self.queued)
+
+    def qsize(self) -> int:
+        return len(self.queued)
+
+    def empty(self) -> bool:
+        return not self.queued
+
+    def score(self, url: str, depth: int, inbound: int, boost: float = 0.0) -> float:
+        # lower is crawled first
+        if self.mode == "bfs":
+            return depth
+        score = depth - boost - self.inbound_weight * math.log2(1 + inbound)
+        for pattern, boost in self.rules:
+            if pattern.search(url):
+                score -= boost
+        return score
+
+    def push(self, key: str, url: str, depth: int, inbound: int, boost: float):
+        score = self.score(url, depth, inbound, boost)
+        entry = [score, next(self.seq), url, depth, inbound, boost, key]
+        self.queued[key] = entry
+        heapq.heappush(self.heap, entry)
+        self.not_empty.set()
+
+    def put_nowait(
+        self,
+        url: str,
+        depth: int = 0,
+        key: Optional[str] = None,
+        boost: float = 0.0,
+    ):
+        self.push(key or url, url, depth, 1, boost)
+        self.unfinished += 1
+        self.finished.clear()
+
+    def add_inbound(self, key: str) -> bool:
+        # another link to a url that is still waiting, true if it was queued
+        entry = self.queued.get(key)
+        if entry is None:
+            return False
+        _, _, url, depth, inbound, boost, _ = entry
+        if self.mode == "bfs":
+            entry[4] += 1
+            return True
+        entry[6] = None
+        self.push(key, url, depth, inbound + 1, boost)
+        return True
+
+    def get_nowait(self) -> Tuple[str, int]:
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            key = entry[6]
+            if key is None:
+                continue
+            del self.queued[key]
+            return entry[2], entry[3]
+        raise asyncio.QueueEmpty()
+
+    async def get(self) -> Tuple[str, int]:
+        while not self.queued:
+            self.not_empty.clear()
+            await self.not_empty.wait()
+        return self.get_nowait()
+
+    def task_done(self):
+        self.unfinished -= 1
+        if self.unfinished <= 0:
+            self.finished.set()
+
+    async def join(self):
+        await self.finished.wait()
@@ -0,0 +1,75 @@
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    record: dict
+
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    # on-disk cache of validators and extracted records, keyed by normalized url
+    def __init__(self, path: str, commit_every: int = 100):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                record TEXT NOT NULL
+            )
+            """)
+        self.conn.commit()
+
+    def get(self, normalized_url: str) -> Optional[CacheEntry]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, record FROM responses WHERE url = ?",
+            (normalized_url,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, record = row
+        return CacheEntry(etag, last_modified, json.loads(record))
+
+    def put(
+        self,
+        normalized_url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        record: dict,
+    ):
+        # nothing to revalidate against, so don't keep it
+        if not etag and not last_modified:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+            (normalized_url, etag, last_modified, json.dumps(record)),
+        )
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
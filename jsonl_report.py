@@ -0,0 +1,61 @@
+import json
+import os
+from collections.abc import Mapping
+from typing import Dict
+
+
+class JsonlReportWriter:
+    # appends one json object per page as soon as it is extracted
+    def __init__(self, filename: str, append: bool = False, flush_every: int = 50):
+        self.filename = filename
+        self.flush_every = flush_every
+        self.unflushed = 0
+        self.file = open(filename, "a" if append else "w", encoding="utf-8")
+
+    def write(self, data: dict):
+        self.file.write(json.dumps(data, ensure_ascii=False))
+        self.file.write("\n")
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.unflushed = 0
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def truncate(self, size: int):
+        # drops whatever was written after size, including a torn last line
+        self.file.truncate(size)
+
+    def annotate(self, columns: Dict[str, dict]):
+        # adds per-page fields computed after the crawl by rewriting the
+        # report line by line, keyed by page url
+        self.file.close()
+        temp_filename = self.filename + ".tmp"
+        with open(self.filename, encoding="utf-8") as src:
+            with open(temp_filename, "w", encoding="utf-8") as dst:
+                for line in src:
+                    data = json.loads(line)
+                    data.update(columns.get(data["url"], {}))
+                    dst.write(json.dumps(data, ensure_ascii=False))
+                    dst.write("\n")
+        os.replace(temp_filename, self.filename)
+        self.file = open(self.filename, "a", encoding="utf-8")
+
+    def close(self):
+        self.file.close()
+
+
+def write_jsonl_report(page_data: dict, filename: str = "report.jsonl"):
+    writer = JsonlReportWriter(filename)
+    try:
+        for data in page_data.values():
+            if not isinstance(data, Mapping):
+                continue
+            # stored page records are not json serializable themselves
+            writer.write(dict(data))
+    finally:
+        writer.close()
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# responses that mean the server wants us to slow down
+BACKOFF_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class HostLimit:
+    # aimd concurrency limit for a single host
+    def __init__(
+        self,
+        host: str,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        latency_tolerance: float = 2.0,
+    ):
+        self.host = host
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.successes = 0
+        self.baseline_latency: Optional[float] = None
+        self.last_decrease = 0.0
+        self.blocked_until = 0.0
+        self.changed = asyncio.Condition()
+        self.history: List[Tuple[float, int, str]] = [
+            (time.monotonic(), initial, "start")
+        ]
+
+    async def acquire(self):
+        async with self.changed:
+            await self.changed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        # honour Retry-After before sending anything to the host
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self):
+        async with self.changed:
+            self.in_flight -= 1
+            self.changed.notify_all()
+
+    def set_limit(self, limit: int, reason: str):
+        limit = max(self.min_limit, min(self.max_limit, limit))
+        if limit == self.limit:
+            return
+        self.limit = limit
+        self.history.append((time.monotonic(), limit, reason))
+
+    def on_success(self, latency: float):
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+        # slow-moving baseline so one slow page doesn't reset it
+        self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+        if latency > self.baseline_latency * self.latency_tolerance:
+            self.successes = 0
+            return
+
+        # additive increase: +1 after a full window of stable responses
+        self.successes += 1
+        if self.successes >= self.limit:
+            self.successes = 0
+            self.set_limit(self.limit + 1, "stable latency")
+
+    def on_backoff(self, reason: str, retry_after: float = 0.0):
+        now = time.monotonic()
+        self.successes = 0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        # multiplicative decrease, at most once per latency window so a burst
+        # of failures from the same overload only halves the limit once
+        window = self.baseline_latency or 1.0
+        if now - self.last_decrease < window:
+            return
+        self.last_decrease = now
+        self.set_limit(self.limit // 2, reason)
+
+
+class FetchSlot:
+    def __init__(self, host_limit: HostLimit):
+        self.host_limit = host_limit
+        self.started = time.monotonic()
+
+    def observe(self, status: int, retry_after: Optional[str] = None):
+        if status in BACKOFF_STATUSES:
+            self.host_limit.on_backoff(
+                f"status {status}", parse_retry_after(retry_after)
+            )
+        else:
+            self.host_limit.on_success(time.monotonic() - self.started)
+
+
+class AdaptiveLimiter:
+    # per-host concurrency limits that grow while latency is stable and back
+    # off on 429/503/timeouts
+    def __init__(self, max_limit: int, initial: int = 2, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.initial = min(initial, max_limit)
+        self.min_limit = min_limit
+        self.hosts: Dict[str, HostLimit] = {}
+
+    def host_limit(self, url: str) -> HostLimit:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostLimit(
+                host, self.initial, self.min_limit, self.max_limit
+            )
+        return self.hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host_limit = self.host_limit(url)
+        await host_limit.acquire()
+        slot = FetchSlot(host_limit)
+        try:
+            yield slot
+        except asyncio.TimeoutError:
+            host_limit.on_backoff("timeout")
+            raise
+        finally:
+            await host_limit.release()
+
+    def summary(self, max_changes: int = 10) -> List[str]:
+        lines = []
+        for host, host_limit in self.hosts.items():
+            limits = [limit for _, limit, _ in host_limit.history]
+            lines.append(
+                f"concurrency {host}: limit {host_limit.limit} "
+                f"(min {min(limits)}, max {max(limits)}, "
+                f"{len(host_limit.history) - 1} changes)"
+            )
+            start = host_limit.history[0][0]
+            for changed_at, limit, reason in host_limit.history[1:][-max_changes:]:
+                lines.append(f"  +{changed_at - start:.1f}s -> {limit} ({reason})")
+        return lines
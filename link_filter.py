@@ -0,0 +1,93 @@
+import re
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from urls import normalize_url
+
+# links to these are never pages, skip them instead of fetching them as far
+# as the content-type check
+DEFAULT_SKIP_EXTENSIONS = (
+    "7z avi bmp css csv doc docx exe gif gz ico iso jpeg jpg js json m4a mov "
+    "mp3 mp4 mpeg ogg pdf png ppt pptx rar rss svg tar tgz tif tiff txt wav "
+    "webm webp woff woff2 xls xlsx xml zip"
+).split()
+
+# in the order they run, a link is counted against the first that drops it
+STAGES = ("scheme", "scope", "extension", "deny", "allow", "duplicate")
+
+
+def parse_extensions(value: str) -> List[str]:
+    # "pdf,.zip, jpg" -> ["pdf", "zip", "jpg"], "" turns the stage off
+    return [ext.strip().lstrip(".").lower() for ext in value.split(",") if ext.strip()]
+
+
+def compile_patterns(patterns: Optional[Iterable[str]]) -> Optional[re.Pattern]:
+    # one alternation per list so each link is matched once per stage
+    patterns = list(patterns or [])
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class LinkFilter:
+    # the links of a page go through every stage in one pass before any of
+    # them reaches the frontier, so off-site, non-http, binary, denied and
+    # repeated links cost neither a schedule() call nor a request
+    def __init__(
+        self,
+        domains: Iterable[str],
+        schemes: Iterable[str] = ("http", "https"),
+        skip_extensions: Optional[Iterable[str]] = None,
+        deny_patterns: Optional[Iterable[str]] = None,
+        allow_patterns: Optional[Iterable[str]] = None,
+    ):
+        self.domains = frozenset(domains)
+        self.schemes = frozenset(schemes)
+        if skip_extensions is None:
+            skip_extensions = DEFAULT_SKIP_EXTENSIONS
+        extensions = sorted(ext.lower() for ext in skip_extensions)
+        self.extension = (
+            re.compile(r"\.(?:" + "|".join(map(re.escape, extensions)) + r")$", re.I)
+            if extensions
+            else None
+        )
+        self.deny = compile_patterns(deny_patterns)
+        self.allow = compile_patterns(allow_patterns)
+        self.dropped: Dict[str, int] = dict.fromkeys(STAGES, 0)
+
+    def filter(self, urls: Iterable[str]) -> List[str]:
+        # bound once here, the loop below runs for every link of every page
+        schemes, domains = self.schemes, self.domains
+        extension, deny, allow = self.extension, self.deny, self.allow
+        dropped = self.dropped
+        page_keys = set()
+        kept = []
+        for url in urls:
+            parsed = urlparse(url)
+            if parsed.scheme not in schemes:
+                dropped["scheme"] += 1
+            elif parsed.netloc not in domains:
+                dropped["scope"] += 1
+            elif extension and extension.search(parsed.path):
+                dropped["extension"] += 1
+            elif deny and deny.search(url):
+                dropped["deny"] += 1
+            elif allow and not allow.search(url):
+                dropped["allow"] += 1
+            else:
+                # links that differ only in query or fragment count once
+                key = normalize_url(url)
+                if key in page_keys:
+                    dropped["duplicate"] += 1
+                    continue
+                page_keys.add(key)
+                kept.append(url)
+        return kept
+
+    def summary(self) -> List[str]:
+        total = sum(self.dropped.values())
+        if not total:
+            return []
+        stages = ", ".join(
+            f"{count} {stage}" for stage, count in self.dropped.items() if count
+        )
+        return [f"filtered {total} links before scheduling: {stages}"]
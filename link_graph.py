@@ -0,0 +1,148 @@
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# crawl status of a node
+UNCRAWLED = 0
+CRAWLED = 1
+FAILED = 2
+
+GRAPH_FIELDNAMES = ["inbound_links", "pagerank", "orphan", "broken_links"]
+
+
+def count_keys(size: int, keys: array) -> array:
+    counts = array("I", bytes(4 * size))
+    for key in keys:
+        counts[key] += 1
+    return counts
+
+
+def build_csr(size: int, keys: array, values: array) -> Tuple[array, array]:
+    # counting sort of (key, value) pairs into offsets + values, so the
+    # values of key k are values[offsets[k]:offsets[k + 1]]
+    offsets = array("Q", accumulate(count_keys(size, keys), initial=0))
+    sorted_values = array("I", bytes(4 * len(values)))
+    cursor = list(offsets[:-1])
+    for key, value in zip(keys, values):
+        sorted_values[cursor[key]] = value
+        cursor[key] += 1
+    return offsets, sorted_values
+
+
+class LinkGraph:
+    # integer-id link graph of the crawl: urls are interned once and edges
+    # are two packed arrays until the metrics are computed
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.page_urls: Dict[int, str] = {}
+        self.status = bytearray()
+        self.seeds = set()
+        self.sources = array("I")
+        self.targets = array("I")
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    def node(self, key: str) -> int:
+        node = self.ids.get(key)
+        if node is None:
+            node = len(self.status)
+            self.ids[key] = node
+            self.status.append(UNCRAWLED)
+        return node
+
+    def add_seed(self, key: str):
+        self.seeds.add(self.node(key))
+
+    def add_page(
+        self,
+        key: str,
+        page_url: Optional[str],
+        link_keys: Iterable[str],
+        ok: bool = True,
+    ):
+        source = self.node(key)
+        self.status[source] = CRAWLED if ok else FAILED
+        if page_url:
+            self.page_urls[source] = page_url
+        # several links from one page to the same target count once
+        for link_key in dict.fromkeys(link_keys):
+            target = self.node(link_key)
+            if target != source:
+                self.sources.append(source)
+                self.targets.append(target)
+
+    def inbound_counts(self) -> array:
+        return count_keys(len(self), self.targets)
+
+    def broken_counts(self) -> array:
+        # links to pages that were crawled and failed
+        counts = array("I", bytes(4 * len(self)))
+        status = self.status
+        for source, target in zip(self.sources, self.targets):
+            if status[target] == FAILED:
+                counts[source] += 1
+        return counts
+
+    def pagerank(
+        self, damping: float = 0.85, iterations: int = 100, tolerance: float = 1e-6
+    ) -> List[float]:
+        size = len(self)
+        if not size:
+            return []
+        out_degree = count_keys(size, self.sources)
+        # pull form over the transposed graph: each node sums the shares of
+        # the pages linking to it, the inner sum runs as one C-level
+        # map/sum per node instead of a python loop per edge
+        in_offsets, in_sources = build_csr(size, self.targets, self.sources)
+        pulls = [
+            (node, in_offsets[node], in_offsets[node + 1])
+            for node in range(size)
+            if in_offsets[node] != in_offsets[node + 1]
+        ]
+        dangling_nodes = [i for i in range(size) if not out_degree[i]]
+
+        rank = [1.0 / size] * size
+        for _ in range(iterations):
+            share = [r / d if d else 0.0 for r, d in zip(rank, out_degree)]
+            get = share.__getitem__
+            # rank of pages without links is spread evenly over every page
+            dangling = sum(map(rank.__getitem__, dangling_nodes))
+            base = (1 - damping) / size + damping * dangling / size
+            new_rank = [base] * size
+            for node, start, end in pulls:
+                new_rank[node] += damping * sum(map(get, in_sources[start:end]))
+            delta = sum(abs(a - b) for a, b in zip(new_rank, rank))
+            rank = new_rank
+            if delta < tolerance:
+                break
+        return rank
+
+    def page_metrics(self) -> Dict[str, dict]:
+        # graph columns for every crawled page, keyed by the page url
+        inbound = self.inbound_counts()
+        broken = self.broken_counts()
+        rank = self.pagerank()
+        metrics = {}
+        for node, page_url in self.page_urls.items():
+            if self.status[node] != CRAWLED:
+                continue
+            metrics[page_url] = {
+                "inbound_links": inbound[node],
+                "pagerank": round(rank[node], 8),
+                "orphan": not inbound[node] and node not in self.seeds,
+                "broken_links": broken[node],
+            }
+        return metrics
+
+    def summary(self, metrics: Dict[str, dict]) -> List[str]:
+        orphans = sum(1 for page in metrics.values() if page["orphan"])
+        broken = sum(page["broken_links"] for page in metrics.values())
+        top = sorted(metrics.items(), key=lambda item: -item[1]["pagerank"])[:5]
+        lines = [
+            f"link graph: {len(self)} urls, {len(self.sources)} links, "
+            f"{orphans} orphan pages, {broken} broken links"
+        ]
+        for page_url, page in top:
+            lines.append(f"  pagerank {page['pagerank']:.5f} {page_url}")
+        return lines
@@ -1,65 +1,396 @@
+import argparse
 import asyncio
-import sys
-from crawl import crawl_site_async
-from csv_report import write_csv_report
+import json
+from crawl import DEFAULT_MAX_PAGE_BYTES, AsyncCrawler
+from frontier import FRONTIER_MODES, parse_priority_rule
+from link_filter import parse_extensions
+from report import open_report_writer
+from sharded import crawl_sharded
 
 
-async def main():
-    if len(sys.argv) < 2:
-        print("no website provided")
-        sys.exit(1)
-    elif len(sys.argv) > 4:
-        print("too many arguments provided")
-        sys.exit(1)
+def parse_args():
+    parser = argparse.ArgumentParser(description="crawl a website")
+    parser.add_argument("url", help="website to crawl")
+    parser.add_argument("max_concurrency", nargs="?", type=int, default=3)
+    parser.add_argument("max_pages", nargs="?", type=int, default=25)
+    parser.add_argument(
+        "--seeds",
+        default=None,
+        metavar="FILE",
+        help="file of extra seed urls, one per line, crawled in the same run",
+    )
+    parser.add_argument(
+        "--per-host-connections",
+        type=int,
+        default=0,
+        metavar="N",
+        help="cap on open connections to any one host (default: no cap)",
+    )
+    parser.add_argument(
+        "--seen-set",
+        choices=["exact", "bloom", "disk"],
+        default="exact",
+        help="dedup store: packed 64-bit digests, a bloom filter, or digests "
+        "spilled to sqlite",
+    )
+    parser.add_argument(
+        "--bloom-error-rate",
+        type=float,
+        default=0.001,
+        help="false-positive rate of the bloom seen set",
+    )
+    parser.add_argument(
+        "--seen-path",
+        default=None,
+        metavar="PATH",
+        help="sqlite file for the disk seen set (default: a temp file)",
+    )
+    parser.add_argument(
+        "--parse-executor",
+        choices=["process", "thread"],
+        default=None,
+        help="parse pages off the event loop in a process or thread pool",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="size of the parse pool (default: number of cores)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        metavar="PATH",
+        help="sqlite http cache used to revalidate pages on re-crawls",
+    )
+    parser.add_argument(
+        "--archive",
+        default=None,
+        metavar="PATH",
+        help="write raw page responses to a gzipped WARC-style archive, "
+        "re-extract it later with reextract.py",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        metavar="PATH",
+        help="periodically save crawl state to this sqlite file",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the crawl saved in --checkpoint",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="adapt per-host concurrency to latency and 429/503/timeout "
+        "responses, starting at max_concurrency and rising as far as "
+        "--adaptive-max",
+    )
+    parser.add_argument(
+        "--adaptive-max",
+        type=int,
+        default=None,
+        metavar="N",
+        help="ceiling of --adaptive concurrency (default: 4 x max_concurrency)",
+    )
+    parser.add_argument(
+        "--ignore-robots",
+        action="store_true",
+        help="don't fetch or obey robots.txt",
+    )
+    parser.add_argument(
+        "--crawl-delay",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="minimum delay between requests to the same host",
+    )
+    parser.add_argument(
+        "--max-page-bytes",
+        type=int,
+        default=DEFAULT_MAX_PAGE_BYTES,
+        metavar="BYTES",
+        help="stop reading a response after this many bytes",
+    )
+    parser.add_argument(
+        "--link-budget",
+        type=int,
+        default=None,
+        metavar="N",
+        help="keep at most N links and N images per page, and stop reading "
+        "a page once they and the other fields are found",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="serve live prometheus metrics on http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        default=None,
+        metavar="FILE",
+        help="write a json summary of the crawl metrics at the end",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        metavar="N",
+        help="retry timeouts, connection errors and 408/429/5xx responses "
+        "up to N times with jittered exponential backoff",
+    )
+    parser.add_argument(
+        "--retry-delay",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="base delay of the retry backoff",
+    )
+    parser.add_argument(
+        "--breaker-threshold",
+        type=int,
+        default=5,
+        metavar="N",
+        help="fail fast on a host after N consecutive retryable failures",
+    )
+    parser.add_argument(
+        "--breaker-reset",
+        type=float,
+        default=30.0,
+        metavar="SECONDS",
+        help="how long a failing host is skipped before it is probed again",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        type=int,
+        nargs="?",
+        const=3,
+        default=None,
+        metavar="BITS",
+        help="flag pages whose text simhash is within BITS (default 3) of an "
+        "earlier page and don't follow their links",
+    )
+    parser.add_argument(
+        "--frontier",
+        choices=FRONTIER_MODES,
+        default="priority",
+        help="crawl order: shallow and most-linked pages first, or strict "
+        "breadth-first",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        metavar="N",
+        help="don't follow links more than N clicks from a seed",
+    )
+    parser.add_argument(
+        "--priority-rule",
+        action="append",
+        type=parse_priority_rule,
+        default=None,
+        metavar="PATTERN=BOOST",
+        help="crawl urls matching the regex PATTERN earlier (positive BOOST, "
+        "in depth levels) or later (negative BOOST), repeatable",
+    )
+    parser.add_argument(
+        "--sitemaps",
+        action="store_true",
+        help="seed the frontier from the sitemaps in robots.txt, or "
+        "/sitemap.xml, including sitemap indexes and gzipped sitemaps",
+    )
+    parser.add_argument(
+        "--skip-extensions",
+        type=parse_extensions,
+        default=None,
+        metavar="EXT,EXT",
+        help="don't follow links to files with these extensions (default: "
+        'common binary, media and asset types, "" follows everything)',
+    )
+    parser.add_argument(
+        "--deny",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help="don't follow links matching the regex PATTERN, repeatable",
+    )
+    parser.add_argument(
+        "--allow",
+        action="append",
+        default=None,
+        metavar="PATTERN",
+        help="only follow links matching one of these regexes, repeatable",
+    )
+    parser.add_argument(
+        "--link-graph",
+        action="store_true",
+        help="after the crawl, add inbound link counts, pagerank, orphan "
+        "and broken link columns to the report",
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="stop the crawl after this long, cancelling pages in flight",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=None,
+        metavar="BYTES",
+        help="stop the crawl once this many response bytes were downloaded",
+    )
+    parser.add_argument(
+        "--max-pages-per-host",
+        type=int,
+        default=None,
+        metavar="N",
+        help="crawl at most N pages of any one host",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        metavar="N",
+        help="split the crawl across N processes by url hash, each with its "
+        "own event loop and max_concurrency workers",
+    )
+    parser.add_argument(
+        "--report",
+        action="append",
+        default=None,
+        metavar="FILE",
+        help="stream pages to a .csv, .jsonl or sqlite (.db, .sqlite) report "
+        "(repeatable, default: report.csv)",
+    )
+    args = parser.parse_args()
+    if not args.report:
+        args.report = ["report.csv"]
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    # revalidated pages are never downloaded, so they'd be missing from it
+    if args.archive and args.cache:
+        parser.error("--archive can't be combined with --cache")
+    if args.shards > 1 and (
+        args.checkpoint or args.metrics_port or args.metrics_json or args.link_graph
+    ):
+        parser.error(
+            "--shards can't be combined with --checkpoint, --link-graph or the "
+            "metrics options"
+        )
+    if args.shards > 1 and (args.max_bytes or args.max_pages_per_host):
+        parser.error(
+            "--shards can't be combined with --max-bytes or --max-pages-per-host"
+        )
+    # near-duplicates usually hash to different shards, each with its own index
+    if args.shards > 1 and args.near_duplicates is not None:
+        parser.error("--shards can't be combined with --near-duplicates")
+    return args
+
 
-    max_concurrency = 3
-    if len(sys.argv) == 3:
-        max_concurrency = int(sys.argv[2])
+def write_metrics_json(crawler: AsyncCrawler, filename: str):
+    print(f"writing metrics to {filename}...")
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(crawler.metrics.summary(), f, indent=2)
 
-    max_pages = 25
-    if len(sys.argv) == 4:
-        max_pages = int(sys.argv[3])
 
-    url = sys.argv[1]
-    print(f"starting crawl of: {url}")
+def read_seeds(filename: str) -> list:
+    with open(filename, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
 
-    page_data = await crawl_site_async(url, max_concurrency, max_pages)
-    successful_visits = 0
-    for normalized_url, data in page_data.items():
-        # invalid entry
-        if not isinstance(data, dict):
-            continue
 
-        # print(normalized_url)
-        # for k, v in data.items():
-        #     if isinstance(v, list):
-        #         print(f"\t{k}: [")
-        #         for item in v:
-        #             text = textwrap.fill(
-        #                 str(item),
-        #                 initial_indent="\t\t",
-        #                 subsequent_indent="\t\t",
-        #             )
-        #             print(text)
-        #         print("\t]")
-        #     else:
-        #         text = textwrap.fill(
-        #             str(v),
-        #             initial_indent="",
-        #             subsequent_indent="\t\t",
-        #         )
-        #         print(f"\t{k}: {text}")
+async def main():
+    args = parse_args()
+    max_concurrency = args.max_concurrency
+    max_pages = args.max_pages
 
-        successful_visits += 1
+    url = args.url
+    seeds = [url]
+    if args.seeds:
+        seeds.extend(read_seeds(args.seeds))
+    print(f"starting crawl of: {', '.join(seeds)}")
 
-    print(f"complete crawing {url} ({successful_visits}/{len(page_data)}) pages.")
-    filename = "report.csv"
-    print(f"writing report to {filename}...")
+    # reports are written as pages are extracted, so a partial crawl still
+    # leaves its results on disk
+    report_writers = []
+    crawler = None
     try:
-        write_csv_report(page_data, filename)
-        print("finished writing report.")
-    except Exception as e:
-        print(f"failed to write report: {str(e)}")
+        for filename in args.report:
+            print(f"writing report to {filename}...")
+            report_writers.append(open_report_writer(filename, append=args.resume))
+
+        options = dict(
+            parse_executor=args.parse_executor,
+            parse_workers=args.parse_workers,
+            cache_path=args.cache,
+            archive_path=args.archive,
+            adaptive_concurrency=args.adaptive,
+            max_adaptive_concurrency=args.adaptive_max,
+            obey_robots=not args.ignore_robots,
+            min_crawl_delay=args.crawl_delay,
+            per_host_connections=args.per_host_connections,
+            seen_set=args.seen_set,
+            bloom_error_rate=args.bloom_error_rate,
+            seen_path=args.seen_path,
+            max_page_bytes=args.max_page_bytes,
+            link_budget=args.link_budget,
+            retries=args.retries,
+            retry_base_delay=args.retry_delay,
+            breaker_threshold=args.breaker_threshold,
+            breaker_reset=args.breaker_reset,
+            near_duplicate_distance=args.near_duplicates,
+            frontier_mode=args.frontier,
+            max_depth=args.max_depth,
+            priority_rules=args.priority_rule,
+            use_sitemaps=args.sitemaps,
+            skip_extensions=args.skip_extensions,
+            deny_patterns=args.deny,
+            allow_patterns=args.allow,
+            max_seconds=args.max_time,
+            max_bytes=args.max_bytes,
+            max_pages_per_host=args.max_pages_per_host,
+        )
+        if args.shards > 1:
+            pages_ok, pages_failed = crawl_sharded(
+                seeds,
+                args.shards,
+                max_concurrency,
+                max_pages,
+                report_writers,
+                **options,
+            )
+        else:
+            crawler = AsyncCrawler(
+                seeds,
+                max_concurrency,
+                max_pages,
+                checkpoint_path=args.checkpoint,
+                resume=args.resume,
+                report_writers=report_writers,
+                metrics_port=args.metrics_port,
+                link_graph=args.link_graph,
+                **options,
+            )
+            async with crawler:
+                await crawler.crawl()
+            pages_ok, pages_failed = crawler.pages_ok, crawler.pages_failed
+    finally:
+        for writer in report_writers:
+            writer.close()
+        if report_writers:
+            print("finished writing report.")
+
+        if crawler and args.metrics_json:
+            write_metrics_json(crawler, args.metrics_json)
+
+    total = pages_ok + pages_failed
+    print(f"complete crawing {url} ({pages_ok}/{total}) pages.")
 
 
 if __name__ == "__main__":
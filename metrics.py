@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import aiohttp
+from aiohttp import web
+
+# seconds, from fast local responses up to the 15s request timeout
+LATENCY_BUCKETS = [
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    15.0,
+]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # last slot is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        # upper bound of the bucket holding the quantile
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p99": self.quantile(0.99),
+        }
+
+
+def label_key(labels: Optional[dict]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    # counters, gauges and latency histograms for one crawl
+    def __init__(self, prefix: str = "crawler"):
+        self.prefix = prefix
+        self.started = time.monotonic()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1, labels: Optional[dict] = None):
+        series = self.counters.setdefault(name, {})
+        key = label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, labels: Optional[dict] = None):
+        self.gauges.setdefault(name, {})[label_key(labels)] = value
+
+    def add_gauge(self, name: str, amount: float, labels: Optional[dict] = None):
+        series = self.gauges.setdefault(name, {})
+        key = label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Optional[dict] = None):
+        series = self.histograms.setdefault(name, {})
+        key = label_key(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+
+    def summary(self) -> dict:
+        def flatten(series: dict, value=lambda v: v) -> dict:
+            return {
+                f"{name}{format_labels(labels)}": value(item)
+                for name, by_labels in sorted(series.items())
+                for labels, item in sorted(by_labels.items())
+            }
+
+        return {
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+            "counters": flatten(self.counters),
+            "gauges": flatten(self.gauges),
+            "histograms": flatten(self.histograms, lambda h: h.summary()),
+        }
+
+    def prometheus(self) -> str:
+        lines = []
+        for kind, series in (("counter", self.counters), ("gauge", self.gauges)):
+            for name, by_labels in sorted(series.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in sorted(by_labels.items()):
+                    lines.append(f"{full_name}{format_labels(labels)} {value}")
+
+        for name, by_labels in sorted(self.histograms.items()):
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, histogram in sorted(by_labels.items()):
+                cumulative = 0
+                bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    bucket_labels = format_labels(labels, f'le="{bound}"')
+                    lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{full_name}_sum{format_labels(labels)} {histogram.sum}")
+                lines.append(
+                    f"{full_name}_count{format_labels(labels)} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def make_trace_config(metrics: Metrics) -> aiohttp.TraceConfig:
+    # per-request timings for dns, connect and time to first byte
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_dns_resolvehost_start(session, ctx, params):
+        ctx.dns_started = time.perf_counter()
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        metrics.observe("dns_seconds", time.perf_counter() - ctx.dns_started)
+
+    async def on_dns_cache_hit(session, ctx, params):
+        metrics.inc("dns_cache_hits_total")
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        metrics.observe("connect_seconds", time.perf_counter() - ctx.connect_started)
+        metrics.inc("connections_created_total")
+
+    async def on_connection_reuseconn(session, ctx, params):
+        metrics.inc("connections_reused_total")
+
+    async def on_request_end(session, ctx, params):
+        metrics.observe("ttfb_seconds", time.perf_counter() - ctx.started)
+        metrics.inc("responses_total", labels={"status": str(params.response.status)})
+
+    async def on_request_exception(session, ctx, params):
+        metrics.inc(
+            "request_errors_total",
+            labels={"error": type(params.exception).__name__},
+        )
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+async def start_metrics_server(metrics: Metrics, port: int) -> web.AppRunner:
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.prometheus(), content_type="text/plain", charset="utf-8"
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    print(f"serving metrics on http://127.0.0.1:{port}/metrics")
+    return runner
@@ -0,0 +1,119 @@
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+# keys every record has, in report order
+CORE_KEYS = ("url", "h1", "first_paragraph", "outgoing_links", "image_urls")
+
+
+class UrlTable:
+    # every distinct url of a crawl is stored once and referred to by its
+    # index, nav and footer links repeated on every page cost 4 bytes each
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def intern(self, url: str) -> int:
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = len(self.urls)
+            self.ids[url] = url_id
+            self.urls.append(url)
+        return url_id
+
+    def intern_all(self, urls: List[str]) -> array:
+        return array("I", map(self.intern, urls))
+
+    def lookup(self, url_ids: array) -> List[str]:
+        return list(map(self.urls.__getitem__, url_ids))
+
+
+class PageRecord(Mapping):
+    # compact stored form of an extract_page_data dict. reads like the dict
+    # it was built from, so report writers and callers of crawl_site don't
+    # need to know the difference
+    __slots__ = (
+        "table",
+        "url_id",
+        "h1",
+        "first_paragraph",
+        "link_ids",
+        "image_ids",
+        "extra",
+    )
+
+    def __init__(
+        self,
+        table: UrlTable,
+        url: str,
+        h1: str,
+        first_paragraph: str,
+        outgoing_links: List[str],
+        image_urls: List[str],
+        extra: Optional[dict] = None,
+    ):
+        self.table = table
+        self.url_id = table.intern(url)
+        self.h1 = h1
+        self.first_paragraph = first_paragraph
+        self.link_ids = table.intern_all(outgoing_links)
+        self.image_ids = table.intern_all(image_urls)
+        # fingerprint, duplicate_of, graph metrics and registered fields
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, table: UrlTable, data: dict) -> "PageRecord":
+        extra = {key: value for key, value in data.items() if key not in CORE_KEYS}
+        return cls(
+            table,
+            data["url"],
+            data["h1"],
+            data["first_paragraph"],
+            data["outgoing_links"],
+            data["image_urls"],
+            extra,
+        )
+
+    @property
+    def url(self) -> str:
+        return self.table.urls[self.url_id]
+
+    @property
+    def outgoing_links(self) -> List[str]:
+        return self.table.lookup(self.link_ids)
+
+    @property
+    def image_urls(self) -> List[str]:
+        return self.table.lookup(self.image_ids)
+
+    def __getitem__(self, key: str):
+        if key in CORE_KEYS:
+            return getattr(self, key)
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from CORE_KEYS
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return len(CORE_KEYS) + len(self.extra or ())
+
+    def __repr__(self) -> str:
+        return f"PageRecord({self.to_dict()!r})"
+
+    def update(self, columns: dict):
+        # only extra fields can be added after the crawl
+        if any(key in CORE_KEYS for key in columns):
+            raise KeyError("core fields of a page record are read-only")
+        if self.extra is None:
+            self.extra = {}
+        self.extra.update(columns)
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
@@ -0,0 +1,152 @@
+import argparse
+import os
+from collections import deque
+from itertools import batched
+from typing import Iterator, List, Optional, Tuple
+from crawl import extract_page_data_from_bytes, make_parse_executor, normalize_url
+from extract import default_fields
+from report import open_report_writer
+from simhash import SimHashIndex
+from warc import read_warc
+
+# pages handed to a worker at a time, large enough that pickling the batch
+# costs little next to parsing it
+BATCH_SIZE = 32
+
+
+def page_responses(filenames: List[str]) -> Iterator[Tuple[bytes, str, Optional[str]]]:
+    # the responses the crawl would have extracted, once per page
+    seen = set()
+    for filename in filenames:
+        for response in read_warc(filename):
+            if not 200 <= response.status < 300:
+                continue
+            if "text/html" not in response.content_type.lower():
+                continue
+            normalized_url = normalize_url(response.url)
+            if normalized_url in seen:
+                continue
+            seen.add(normalized_url)
+            yield response.body, response.url, response.charset
+
+
+def extract_batch(
+    batch: tuple, url_limit: Optional[int], fields: Optional[List[str]] = None
+) -> List[dict]:
+    return [
+        extract_page_data_from_bytes(body, url, charset, url_limit, fields)
+        for body, url, charset in batch
+    ]
+
+
+def parse_archives(
+    filenames: List[str],
+    workers: Optional[int] = None,
+    url_limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Iterator[dict]:
+    # parses archived pages on every core, in archive order. only a few
+    # batches per worker are in flight, so memory stays flat however large
+    # the archive is
+    workers = workers or os.cpu_count() or 1
+    with make_parse_executor("process", workers) as executor:
+        pending = deque()
+        for batch in batched(page_responses(filenames), BATCH_SIZE):
+            pending.append(executor.submit(extract_batch, batch, url_limit, fields))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def mark_near_duplicates(pages: Iterator[dict], distance: int) -> Iterator[dict]:
+    # the check the crawl makes, in archive order, which is crawl order
+    index = SimHashIndex(distance)
+    for data in pages:
+        if data.get("fingerprint") is not None:
+            original = index.check(data["fingerprint"], data["url"])
+            if original is not None:
+                data["duplicate_of"] = original
+        yield data
+
+
+def extract_archives(
+    filenames: List[str],
+    workers: Optional[int] = None,
+    url_limit: Optional[int] = None,
+    near_duplicate_distance: Optional[int] = None,
+) -> Iterator[dict]:
+    if near_duplicate_distance is None:
+        return parse_archives(filenames, workers, url_limit)
+    fields = default_fields() + ["fingerprint"]
+    pages = parse_archives(filenames, workers, url_limit, fields)
+    return mark_near_duplicates(pages, near_duplicate_distance)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="rebuild a crawl report from archived responses, offline"
+    )
+    parser.add_argument(
+        "archive", nargs="+", help="archive written by main.py --archive"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parse processes (default: number of cores)",
+    )
+    parser.add_argument(
+        "--link-budget",
+        type=int,
+        default=None,
+        metavar="N",
+        help="keep at most N links and N images per page, as in the crawl",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        type=int,
+        nargs="?",
+        const=3,
+        default=None,
+        metavar="BITS",
+        help="flag pages whose text simhash is within BITS (default 3) of an "
+        "earlier archived page, as in the crawl",
+    )
+    parser.add_argument(
+        "--report",
+        action="append",
+        default=None,
+        metavar="FILE",
+        help="write pages to a .csv, .jsonl or sqlite (.db, .sqlite) report "
+        "(repeatable, default: report.csv)",
+    )
+    args = parser.parse_args()
+    if not args.report:
+        args.report = ["report.csv"]
+    return args
+
+
+def main():
+    args = parse_args()
+    report_writers = []
+    pages = 0
+    try:
+        for filename in args.report:
+            print(f"writing report to {filename}...")
+            report_writers.append(open_report_writer(filename))
+        records = extract_archives(
+            args.archive, args.workers, args.link_budget, args.near_duplicates
+        )
+        for data in records:
+            for writer in report_writers:
+                writer.write(data)
+            pages += 1
+    finally:
+        for writer in report_writers:
+            writer.close()
+    print(f"re-extracted {pages} pages from {', '.join(args.archive)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+from csv_report import CsvReportWriter
+from jsonl_report import JsonlReportWriter
+from sqlite_report import SqliteReportWriter
+
+# report writers by file extension
+REPORT_WRITERS = {
+    ".csv": CsvReportWriter,
+    ".jsonl": JsonlReportWriter,
+    ".db": SqliteReportWriter,
+    ".sqlite": SqliteReportWriter,
+}
+
+
+def open_report_writer(filename: str, append: bool = False):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in REPORT_WRITERS:
+        raise ValueError(f"unsupported report format: {filename}")
+    return REPORT_WRITERS[extension](filename, append=append)
@@ -0,0 +1,128 @@
+import asyncio
+import random
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+import aiohttp
+
+# server-side trouble worth another attempt, anything else is final
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class StatusError(Exception):
+    def __init__(self, status: int, retry_after: float = 0.0):
+        super().__init__(f"request failed with status {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, StatusError):
+        return error.status in RETRYABLE_STATUSES
+    return isinstance(
+        error,
+        (
+            asyncio.TimeoutError,
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+        ),
+    )
+
+
+def error_reason(error: Exception) -> str:
+    if isinstance(error, StatusError):
+        return f"status {error.status}"
+    return type(error).__name__
+
+
+class RetryPolicy:
+    def __init__(
+        self, retries: int = 2, base_delay: float = 0.5, max_delay: float = 30.0
+    ):
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float = 0.0) -> float:
+        # full jitter keeps retries from many workers from arriving in lockstep.
+        # retry-after is a floor, but never past max_delay
+        ceiling = min(self.max_delay, self.base_delay * 2**attempt)
+        return min(self.max_delay, max(retry_after, random.uniform(0, ceiling)))
+
+    def waits_too_long(self, retry_after: float) -> bool:
+        # a server asking for a longer pause than we'd ever wait is given up on
+        return retry_after > self.max_delay
+
+
+class CircuitBreaker:
+    # stops sending requests to a host after repeated failures and lets a
+    # single probe through once every reset_timeout
+    def __init__(
+        self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.reset_timeout:
+            # restart the timer so only one probe goes out per window
+            self.state = "half_open"
+            self.opened_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def trip(self):
+        # open at once, the host has told us to stay away
+        if self.state == "closed":
+            self.trips += 1
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state == "closed":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class CircuitBreakers:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hosts: Dict[str, CircuitBreaker] = {}
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = CircuitBreaker(
+                host, self.failure_threshold, self.reset_timeout
+            )
+        return self.hosts[host]
+
+    def summary(self) -> List[str]:
+        return [
+            f"circuit {host}: {breaker.state}, tripped {breaker.trips} times, "
+            f"{breaker.rejected} requests failed fast"
+            for host, breaker in self.hosts.items()
+            if breaker.trips
+        ]
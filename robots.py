@@ -0,0 +1,195 @@
+import asyncio
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+USER_AGENT = "BootCrawler/1.0"
+
+Matcher = Callable[[str], bool]
+
+
+def compile_rule(pattern: str) -> Matcher:
+    # plain prefixes are by far the most common, keep them off the regex engine
+    if "*" not in pattern and not pattern.endswith("$"):
+        return lambda path: path.startswith(pattern)
+
+    anchored = pattern.endswith("$")
+    if anchored:
+        pattern = pattern[:-1]
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    if anchored:
+        regex += "$"
+    compiled = re.compile(regex)
+    return lambda path: compiled.match(path) is not None
+
+
+class RobotsRules:
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, bool]]] = None,
+        crawl_delay: Optional[float] = None,
+        sitemaps: Optional[List[str]] = None,
+        disallow_all: bool = False,
+    ):
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        self.disallow_all = disallow_all
+
+        # longest pattern wins, allow wins a tie
+        ordered = sorted(rules or [], key=lambda rule: (-len(rule[0]), not rule[1]))
+        self.rules = [(compile_rule(pattern), allow) for pattern, allow in ordered]
+
+    def allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        path = parsed.path or "/"
+        if path == "/robots.txt":
+            return True
+        if self.disallow_all:
+            return False
+        if parsed.query:
+            path += "?" + parsed.query
+        for matches, allow in self.rules:
+            if matches(path):
+                return allow
+        return True
+
+
+def parse_robots(text: str, user_agent: str = USER_AGENT) -> RobotsRules:
+    token = user_agent.split("/")[0].lower()
+    groups = []
+    sitemaps = []
+    current = None
+    in_agent_lines = False
+
+    for raw_line in text.splitlines():
+        line = raw_line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key = key.strip().lower()
+        value = value.strip()
+
+        if key == "user-agent":
+            # consecutive user-agent lines share one group
+            if not in_agent_lines:
+                current = {"agents": [], "rules": [], "crawl_delay": None}
+                groups.append(current)
+                in_agent_lines = True
+            current["agents"].append(value.lower())
+            continue
+        in_agent_lines = False
+
+        if key == "sitemap":
+            sitemaps.append(value)
+        elif current is None:
+            continue
+        elif key in ("allow", "disallow") and value:
+            current["rules"].append((value, key == "allow"))
+        elif key == "crawl-delay":
+            try:
+                current["crawl_delay"] = float(value)
+            except ValueError:
+                pass
+
+    # groups naming our crawler win over the wildcard group
+    matched = [group for group in groups if token in group["agents"]]
+    if not matched:
+        matched = [group for group in groups if "*" in group["agents"]]
+
+    rules = []
+    crawl_delay = None
+    for group in matched:
+        rules.extend(group["rules"])
+        if group["crawl_delay"] is not None:
+            crawl_delay = group["crawl_delay"]
+    return RobotsRules(rules, crawl_delay, sitemaps)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # waiters queue on the lock, so tokens are handed out in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PolitenessScheduler:
+    # per-host robots.txt rules and crawl-delay token buckets
+    def __init__(self, request, min_crawl_delay: float = 0.0):
+        self.request = request
+        self.min_crawl_delay = min_crawl_delay
+        self.robots: Dict[str, RobotsRules] = {}
+        self.pending: Dict[str, asyncio.Task] = {}
+        self.buckets: Dict[str, Optional[TokenBucket]] = {}
+        # counted by the crawler, once per url
+        self.disallowed = 0
+
+    async def fetch_robots(self, origin: str) -> RobotsRules:
+        try:
+            async with self.request(f"{origin}/robots.txt") as res:
+                if res.status >= 500:
+                    # server trouble, assume the whole site is off limits
+                    return RobotsRules(disallow_all=True)
+                if not res.ok:
+                    return RobotsRules()
+                text = await res.text(errors="replace")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"failed fetching {origin}/robots.txt: {str(e)}")
+            return RobotsRules()
+        return parse_robots(text)
+
+    async def get_rules(self, url: str) -> RobotsRules:
+        parsed = urlparse(url)
+        host = parsed.netloc
+        if host in self.robots:
+            return self.robots[host]
+
+        # one robots.txt fetch per host, everyone else waits on it. shielded,
+        # so a cancelled waiter doesn't cancel the fetch for the others
+        task = self.pending.get(host)
+        if task is None:
+            origin = f"{parsed.scheme}://{host}"
+            task = asyncio.create_task(self.fetch_robots(origin))
+            task.add_done_callback(lambda done: self.fetched(host, done))
+            self.pending[host] = task
+        return await asyncio.shield(task)
+
+    def fetched(self, host: str, task: asyncio.Task):
+        # a cancelled or failed fetch is forgotten so the next lookup retries
+        if self.pending.get(host) is task:
+            del self.pending[host]
+        if not task.cancelled() and task.exception() is None:
+            self.robots[host] = task.result()
+
+    async def allowed(self, url: str) -> bool:
+        rules = await self.get_rules(url)
+        return rules.allowed(url)
+
+    async def wait_turn(self, url: str):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            rules = await self.get_rules(url)
+            delay = max(rules.crawl_delay or 0.0, self.min_crawl_delay)
+            # another request may have made the bucket while rules were fetched
+            self.buckets.setdefault(host, TokenBucket(1 / delay) if delay > 0 else None)
+        bucket = self.buckets[host]
+        if bucket:
+            await bucket.acquire()
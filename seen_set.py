@@ -0,0 +1,248 @@
+import math
+import os
+import sqlite3
+import tempfile
+from array import array
+from hashlib import blake2b
+from typing import Optional
+
+
+def url_digest(url: str) -> int:
+    # 64-bit digest, collisions are negligible well past millions of urls
+    return int.from_bytes(blake2b(url.encode(), digest_size=8).digest(), "big")
+
+
+class DigestSet:
+    # exact open-addressing hash set of 64-bit url digests packed in an array,
+    # about 8-16 bytes per url instead of a python string per url
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity * 2:
+            size *= 2
+        self.slots = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _find(self, digest: int) -> int:
+        # 0 marks an empty slot, so the (unlikely) zero digest is remapped
+        digest = digest or 1
+        index = digest & self.mask
+        slots = self.slots
+        while slots[index] and slots[index] != digest:
+            index = (index + 1) & self.mask
+        return index
+
+    def add_digest(self, digest: int) -> bool:
+        index = self._find(digest)
+        if self.slots[index]:
+            return False
+        self.slots[index] = digest or 1
+        self.count += 1
+        if self.count * 10 > len(self.slots) * 6:
+            self._grow()
+        return True
+
+    def contains_digest(self, digest: int) -> bool:
+        return self.slots[self._find(digest)] != 0
+
+    def _grow(self):
+        old = self.slots
+        self.slots = array("Q", bytes(16 * len(old)))
+        self.mask = len(self.slots) - 1
+        for digest in old:
+            if digest:
+                self.slots[self._find(digest)] = digest
+
+    def add(self, url: str) -> bool:
+        return self.add_digest(url_digest(url))
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains_digest(url_digest(url))
+
+    def clear(self):
+        self.slots = array("Q", bytes(8 * len(self.slots)))
+        self.count = 0
+
+    def memory_bytes(self) -> int:
+        return self.slots.itemsize * len(self.slots)
+
+    def close(self):
+        pass
+
+
+class BloomSeenSet:
+    # probabilistic set: a false positive skips an unseen url, never refetches
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.size = max(bits, 8)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _positions(self, url: str):
+        digest = blake2b(url.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, url: str) -> bool:
+        new = False
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, url: str) -> bool:
+        for position in self._positions(url):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    def close(self):
+        pass
+
+
+class ScalableBloomSeenSet:
+    # chain of bloom filters: once the newest one holds its capacity a bigger
+    # one with a tighter error rate is added, so the combined false-positive
+    # rate stays under error_rate however many urls are discovered
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float = 0.001,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+        self.count = 0
+        self._add_filter()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _add_filter(self):
+        # the error rates form a geometric series summing to error_rate
+        layer = len(self.filters)
+        capacity = self.capacity * self.growth**layer
+        error_rate = self.error_rate * (1 - self.tightening) * self.tightening**layer
+        self.filters.append(BloomSeenSet(capacity, error_rate))
+
+    def add(self, url: str) -> bool:
+        if url in self:
+            return False
+        newest = self.filters[-1]
+        if newest.count >= newest.capacity:
+            self._add_filter()
+            newest = self.filters[-1]
+        newest.add(url)
+        self.count += 1
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        return any(url in bloom for bloom in self.filters)
+
+    def memory_bytes(self) -> int:
+        return sum(bloom.memory_bytes() for bloom in self.filters)
+
+    def close(self):
+        pass
+
+
+class SpillSeenSet:
+    # exact set that keeps recent digests in memory and spills them to sqlite
+    def __init__(self, path: Optional[str] = None, memory_limit: int = 1_000_000):
+        # a temp file only lives as long as the crawl
+        self.temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="seen-", suffix=".db")
+            os.close(fd)
+        self.path = path
+        self.memory_limit = memory_limit
+        self.memory = DigestSet()
+        self.count = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (digest INTEGER PRIMARY KEY)"
+        )
+        self.conn.execute("DELETE FROM seen")
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @staticmethod
+    def _signed(digest: int) -> int:
+        # sqlite integers are signed 64-bit
+        return digest - (1 << 64) if digest >= 1 << 63 else digest
+
+    def _on_disk(self, digest: int) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM seen WHERE digest = ?", (self._signed(digest),)
+        ).fetchone()
+        return row is not None
+
+    def add(self, url: str) -> bool:
+        digest = url_digest(url)
+        if self.memory.contains_digest(digest) or self._on_disk(digest):
+            return False
+        self.memory.add_digest(digest)
+        self.count += 1
+        if len(self.memory) >= self.memory_limit:
+            self.spill()
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        digest = url_digest(url)
+        return self.memory.contains_digest(digest) or self._on_disk(digest)
+
+    def spill(self):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?)",
+                ((self._signed(digest),) for digest in self.memory.slots if digest),
+            )
+        self.memory.clear()
+
+    def memory_bytes(self) -> int:
+        return self.memory.memory_bytes()
+
+    def close(self):
+        self.conn.close()
+        if self.temporary:
+            os.remove(self.path)
+
+
+def make_seen_set(
+    kind: str = "exact",
+    capacity: int = 1024,
+    error_rate: float = 0.001,
+    path: Optional[str] = None,
+):
+    if kind == "exact":
+        return DigestSet()
+    if kind == "bloom":
+        return ScalableBloomSeenSet(capacity, error_rate)
+    if kind == "disk":
+        return SpillSeenSet(path)
+    raise ValueError(f"unknown seen set: {kind}")
@@ -0,0 +1,351 @@
+import asyncio
+import multiprocessing
+import queue
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from crawl import AsyncCrawler, normalize_url, raise_worker_errors
+from link_filter import LinkFilter
+from seen_set import DigestSet, url_digest
+
+# how often an idle shard checks whether the whole crawl has finished
+IDLE_POLL_SECONDS = 0.05
+# how long the parent waits for a message before checking shards are alive
+LIVENESS_POLL_SECONDS = 1.0
+
+
+def shard_for(normalized_url: str, shards: int) -> int:
+    return url_digest(normalized_url) % shards
+
+
+class ResultsWriter:
+    # report writer that ships records to the parent process
+    def __init__(self, results):
+        self.results = results
+
+    def write(self, data: dict):
+        self.results.put(("page", data))
+
+    def close(self):
+        pass
+
+
+class ShardedCrawler(AsyncCrawler):
+    # crawls the slice of the url space whose digest maps to this shard and
+    # routes every other in-scope link to its owner
+    def __init__(
+        self,
+        shard: int,
+        shards: int,
+        inboxes: list,
+        budget,
+        outstanding,
+        dead,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.shard = shard
+        self.shards = shards
+        self.inboxes = inboxes
+        self.inbox = inboxes[shard]
+        self.budget = budget
+        # queued, routed and in-flight pages, counted per owning shard so
+        # the share of a shard that died can be written off
+        self.outstanding = outstanding
+        self.dead = dead
+        self.outbox: Dict[int, List[Tuple[str, int, float]]] = {}
+        self.routed = DigestSet()
+
+    def add_outstanding(self, amount: int, owner: Optional[int] = None):
+        owner = self.shard if owner is None else owner
+        with self.outstanding.get_lock():
+            self.outstanding[owner] += amount
+
+    def pending(self) -> int:
+        return sum(
+            count
+            for owner, count in enumerate(self.outstanding)
+            if not self.dead[owner]
+        )
+
+    async def add_page_visit(self, normalized_url: str):
+        if not await super().add_page_visit(normalized_url):
+            return False
+        self.add_outstanding(1)
+        return True
+
+    async def take_page(self) -> bool:
+        # the page budget is shared by every shard
+        with self.budget.get_lock():
+            if self.budget.value < self.max_pages:
+                self.budget.value += 1
+                self.pages_scheduled += 1
+                return True
+        self.should_stop = True
+        # a dropped page never reaches finish_page
+        self.add_outstanding(-1)
+        return False
+
+    async def schedule(self, url: str, depth: int = 0, boost: float = 0.0) -> bool:
+        if not self.in_scope(url):
+            return False
+
+        normalized_url = normalize_url(url)
+        owner = shard_for(normalized_url, self.shards)
+        if owner == self.shard:
+            return await super().schedule(url, depth, boost)
+
+        # each url only needs to reach its owner once
+        if not self.routed.add(normalized_url):
+            return False
+        self.outbox.setdefault(owner, []).append((url, depth, boost))
+        return True
+
+    def flush_outbox(self):
+        for owner, urls in self.outbox.items():
+            # nobody would ever crawl what is sent to a dead shard
+            if self.dead[owner]:
+                continue
+            # counted before sending, so the crawl can't look finished while
+            # the batch is in transit
+            self.add_outstanding(len(urls), owner)
+            self.inboxes[owner].put(urls)
+        self.outbox.clear()
+
+    def finish_page(self, url: str, data: Optional[dict]):
+        super().finish_page(url, data)
+        self.flush_outbox()
+        self.add_outstanding(-1)
+
+    async def pump_inbox(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                urls = await loop.run_in_executor(
+                    None, self.inbox.get, True, IDLE_POLL_SECONDS
+                )
+            except queue.Empty:
+                continue
+            for url, depth, boost in urls:
+                await self.schedule(url, depth, boost)
+            self.flush_outbox()
+            self.add_outstanding(-len(urls))
+
+    async def crawl(self) -> dict:
+        self.crawl_budget.start()
+        workers = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        pump = asyncio.create_task(self.pump_inbox())
+        try:
+            if self.use_sitemaps and self.shard == 0:
+                await self.load_sitemaps()
+                # routed sitemap urls are counted now, release the parent's hold
+                self.flush_outbox()
+                self.add_outstanding(-1)
+
+            # finished once no shard has queued, routed or in-flight pages.
+            # every shard has the same deadline and stops on its own
+            while self.pending() > 0:
+                if self.crawl_budget.expired():
+                    print(f"stopping shard {self.shard}: {self.crawl_budget.reason}")
+                    self.should_stop = True
+                    break
+                raise_worker_errors(workers + [pump])
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+        finally:
+            for task in workers + [pump]:
+                task.cancel()
+            await asyncio.gather(*workers, pump, return_exceptions=True)
+        return self.page_data
+
+
+def shard_options(options: dict, shard: int) -> dict:
+    # sqlite files can't be shared between processes, give each shard its own
+    options = dict(options)
+    for key in ("cache_path", "seen_path", "archive_path"):
+        if options.get(key):
+            options[key] = f"{options[key]}.shard{shard}"
+    return options
+
+
+async def run_shard_async(
+    shard,
+    shards,
+    seeds,
+    max_concurrency,
+    max_pages,
+    options,
+    inboxes,
+    results,
+    budget,
+    outstanding,
+    dead,
+):
+    crawler = ShardedCrawler(
+        shard,
+        shards,
+        inboxes,
+        budget,
+        outstanding,
+        dead,
+        seeds,
+        max_concurrency,
+        max_pages,
+        report_writers=[ResultsWriter(results)],
+        **shard_options(options, shard),
+    )
+    async with crawler:
+        await crawler.crawl()
+    return crawler.pages_ok, crawler.pages_failed
+
+
+def run_shard(
+    shard,
+    shards,
+    seeds,
+    max_concurrency,
+    max_pages,
+    options,
+    inboxes,
+    results,
+    budget,
+    outstanding,
+    dead,
+):
+    try:
+        pages_ok, pages_failed = asyncio.run(
+            run_shard_async(
+                shard,
+                shards,
+                seeds,
+                max_concurrency,
+                max_pages,
+                options,
+                inboxes,
+                results,
+                budget,
+                outstanding,
+                dead,
+            )
+        )
+    except KeyboardInterrupt:
+        pages_ok, pages_failed = 0, 0
+    except Exception as e:
+        print(f"shard {shard} failed: {str(e)}")
+        results.put(("failed", shard))
+        return
+    results.put(("done", shard, pages_ok, pages_failed))
+
+
+def find_dead_shards(processes: list, finished: set, suspects: set) -> List[int]:
+    # a shard that exited without reporting is only dead once it has also
+    # stayed silent for a whole poll, its last messages may still be queued
+    exited = {
+        shard
+        for shard, process in enumerate(processes)
+        if shard not in finished and not process.is_alive()
+    }
+    dead = sorted(exited & suspects)
+    suspects.clear()
+    suspects.update(exited - set(dead))
+    return dead
+
+
+def crawl_sharded(
+    seeds: List[str],
+    shards: int,
+    max_concurrency: int,
+    max_pages: int,
+    report_writers: list,
+    **options,
+) -> tuple[int, int]:
+    # bytes and per-host pages would be counted by each shard on its own
+    if options.get("max_bytes") or options.get("max_pages_per_host"):
+        raise ValueError("byte and per-host budgets can't be split across shards")
+    # each shard would only compare pages against the ones it crawled itself
+    if options.get("near_duplicate_distance") is not None:
+        raise ValueError("near-duplicate detection can't be split across shards")
+    context = multiprocessing.get_context("spawn")
+    inboxes = [context.Queue() for _ in range(shards)]
+    results = context.Queue()
+    budget = context.Value("q", 0)
+    outstanding = context.Array("q", shards)
+    dead = context.Array("b", shards)
+
+    # seeds go through the same link filters as every other url
+    link_filter = LinkFilter(
+        {urlparse(seed).netloc for seed in seeds},
+        skip_extensions=options.get("skip_extensions"),
+        deny_patterns=options.get("deny_patterns"),
+        allow_patterns=options.get("allow_patterns"),
+    )
+    kept = link_filter.filter(seeds)
+    for seed in seeds:
+        if seed not in kept:
+            print(f"seed {seed} is excluded by the link filters")
+
+    # hand each seed to the shard that owns it
+    for seed in kept:
+        owner = shard_for(normalize_url(seed), shards)
+        outstanding[owner] += 1
+        inboxes[owner].put([(seed, 0, 0.0)])
+    # shard 0 reads the sitemaps, keep the crawl open until it is done
+    if options.get("use_sitemaps"):
+        outstanding[0] += 1
+
+    processes = [
+        context.Process(
+            target=run_shard,
+            args=(
+                shard,
+                shards,
+                seeds,
+                max_concurrency,
+                max_pages,
+                options,
+                inboxes,
+                results,
+                budget,
+                outstanding,
+                dead,
+            ),
+        )
+        for shard in range(shards)
+    ]
+    for process in processes:
+        process.start()
+
+    finished = set()
+    suspects = set()
+
+    def give_up_on(shard: int):
+        # the other shards stop waiting for its pages and stop routing to it
+        print(f"shard {shard} died (exit code {processes[shard].exitcode})")
+        finished.add(shard)
+        dead[shard] = 1
+
+    # merge every shard's records into the one set of report writers
+    pages_ok = 0
+    pages_failed = 0
+    try:
+        while len(finished) < shards:
+            try:
+                message = results.get(timeout=LIVENESS_POLL_SECONDS)
+            except queue.Empty:
+                for shard in find_dead_shards(processes, finished, suspects):
+                    give_up_on(shard)
+                continue
+            if message[0] == "page":
+                for writer in report_writers:
+                    writer.write(message[1])
+            elif message[0] == "done":
+                finished.add(message[1])
+                pages_ok += message[2]
+                pages_failed += message[3]
+            elif message[0] == "failed":
+                give_up_on(message[1])
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    return pages_ok, pages_failed
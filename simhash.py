@@ -0,0 +1,92 @@
+import re
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+WORD_RE = re.compile(r"\w+")
+# pages with fewer words share too few shingles for a meaningful comparison
+MIN_FINGERPRINT_WORDS = 10
+
+
+def feature_hash(feature: str) -> int:
+    return int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), "little")
+
+
+def simhash(features: Iterable[str]) -> int:
+    hashes = {feature_hash(feature) for feature in features}
+    if not hashes:
+        return 0
+
+    # pack every hash into one big int, then count the set bits of each
+    # position across all hashes with a shifted mask instead of looping
+    # over 64 bits per feature
+    packed = int.from_bytes(b"".join(h.to_bytes(8, "little") for h in hashes), "little")
+    mask = int.from_bytes(b"\x01\x00\x00\x00\x00\x00\x00\x00" * len(hashes), "little")
+    half = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if ((packed >> bit) & mask).bit_count() > half:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def shingles(words: List[str], size: int = 3) -> List[str]:
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+
+
+def text_fingerprint(text: str) -> int:
+    return simhash(shingles(WORD_RE.findall(text.lower())))
+
+
+def page_fingerprint(text: str) -> Optional[int]:
+    # None for near-empty pages, they would all look alike
+    words = WORD_RE.findall(text.lower())
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+    return simhash(shingles(words))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    # near-duplicate lookup: split fingerprints into distance + 1 bands, two
+    # fingerprints within the distance must share at least one band exactly
+    def __init__(self, distance: int = 3):
+        self.distance = distance
+        bands = distance + 1
+        width = FINGERPRINT_BITS // bands
+        self.bands: List[Tuple[int, int]] = []
+        for band in range(bands):
+            start = band * width
+            end = FINGERPRINT_BITS if band == bands - 1 else start + width
+            self.bands.append((start, (1 << (end - start)) - 1))
+        self.tables: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in self.bands]
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        for (start, mask), table in zip(self.bands, self.tables):
+            for other, url in table.get((fingerprint >> start) & mask, ()):
+                if hamming_distance(fingerprint, other) <= self.distance:
+                    return url
+        return None
+
+    def add(self, fingerprint: int, url: str):
+        for (start, mask), table in zip(self.bands, self.tables):
+            table.setdefault((fingerprint >> start) & mask, []).append(
+                (fingerprint, url)
+            )
+        self.count += 1
+
+    def check(self, fingerprint: int, url: str) -> Optional[str]:
+        # url of an earlier near-duplicate, or None after indexing this page
+        original = self.find(fingerprint)
+        if original is None:
+            self.add(fingerprint, url)
+        return original
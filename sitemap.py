@@ -0,0 +1,102 @@
+import math
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+from xml.etree import ElementTree
+
+GZIP_MAGIC = b"\x1f\x8b"
+# sitemap indexes can point at each other, stop following after this many
+MAX_SITEMAPS = 1000
+
+
+@dataclass
+class SitemapEntry:
+    url: str
+    lastmod: Optional[str] = None
+    # true for <sitemap> entries of a sitemap index
+    is_index: bool = False
+
+
+def local_name(tag: str) -> str:
+    # "{http://www.sitemaps.org/schemas/sitemap/0.9}url" -> "url"
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    # incremental sitemap / sitemap index parser: bytes are fed as they
+    # arrive and each entry is cleared once read, so memory stays flat
+    # however many urls the sitemap lists
+    def __init__(self):
+        self.parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self.decompressor = None
+        self.started = False
+        self.root = None
+
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        if not self.started:
+            # .xml.gz files are served as plain gzip bodies
+            self.started = True
+            if chunk.startswith(GZIP_MAGIC):
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor:
+            chunk = self.decompressor.decompress(chunk)
+        self.parser.feed(chunk)
+        return self.read_entries()
+
+    def close(self) -> List[SitemapEntry]:
+        if self.decompressor:
+            self.parser.feed(self.decompressor.flush())
+        self.parser.close()
+        return self.read_entries()
+
+    def read_entries(self) -> List[SitemapEntry]:
+        entries = []
+        for event, element in self.parser.read_events():
+            if event == "start":
+                if self.root is None:
+                    self.root = element
+                continue
+            tag = local_name(element.tag)
+            if tag not in ("url", "sitemap"):
+                continue
+            fields = {
+                local_name(child.tag): (child.text or "").strip() for child in element
+            }
+            if fields.get("loc"):
+                entries.append(
+                    SitemapEntry(
+                        fields["loc"], fields.get("lastmod") or None, tag == "sitemap"
+                    )
+                )
+            # drop everything read so far from the tree
+            self.root.clear()
+        return entries
+
+
+def parse_sitemap(body: bytes) -> List[SitemapEntry]:
+    parser = SitemapParser()
+    return parser.feed(body) + parser.close()
+
+
+def parse_lastmod(lastmod: Optional[str]) -> Optional[datetime]:
+    # w3c datetime: a date, or a date and time with a timezone
+    if not lastmod:
+        return None
+    try:
+        parsed = datetime.fromisoformat(lastmod.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def lastmod_boost(lastmod: Optional[str], max_boost: float = 0.5) -> float:
+    # recently changed pages go first among sitemap urls, never by more than
+    # half a depth level
+    modified = parse_lastmod(lastmod)
+    if modified is None:
+        return 0.0
+    age_days = max(0.0, (datetime.now(timezone.utc) - modified).total_seconds() / 86400)
+    return max_boost * math.exp(-age_days / 30)
@@ -0,0 +1,150 @@
+import sqlite3
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS urls (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS pages (
+        url_id INTEGER PRIMARY KEY REFERENCES urls (id),
+        h1 TEXT,
+        first_paragraph TEXT,
+        duplicate_of_id INTEGER REFERENCES urls (id)
+    );
+    CREATE TABLE IF NOT EXISTS links (
+        page_id INTEGER NOT NULL REFERENCES urls (id),
+        position INTEGER NOT NULL,
+        target_id INTEGER NOT NULL REFERENCES urls (id)
+    );
+    CREATE TABLE IF NOT EXISTS images (
+        page_id INTEGER NOT NULL REFERENCES urls (id),
+        position INTEGER NOT NULL,
+        image_id INTEGER NOT NULL REFERENCES urls (id)
+    );
+"""
+
+# built once at close, so bulk inserts don't maintain them row by row
+INDEXES = """
+    CREATE INDEX IF NOT EXISTS links_page ON links (page_id);
+    CREATE INDEX IF NOT EXISTS links_target ON links (target_id);
+    CREATE INDEX IF NOT EXISTS images_page ON images (page_id);
+"""
+
+
+class SqliteReportWriter:
+    # normalized report: every url is stored once in urls and pages, links
+    # and images refer to it by id. rows are buffered and inserted in one
+    # transaction per batch
+    def __init__(self, filename: str, append: bool = False, batch_size: int = 500):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.append = append
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if not append:
+            self.conn.executescript("""
+                DELETE FROM links;
+                DELETE FROM images;
+                DELETE FROM pages;
+                DELETE FROM urls;
+                """)
+        self.conn.commit()
+
+        self.url_ids: Dict[str, int] = dict(
+            self.conn.execute("SELECT url, id FROM urls")
+        )
+        self.next_id = max(self.url_ids.values(), default=0) + 1
+        self.new_urls: List[Tuple[int, str]] = []
+        self.pages: List[Tuple[int, str, str, Optional[int]]] = []
+        self.links: List[Tuple[int, int, int]] = []
+        self.images: List[Tuple[int, int, int]] = []
+
+    def url_id(self, url: str) -> int:
+        url_id = self.url_ids.get(url)
+        if url_id is None:
+            url_id = self.next_id
+            self.next_id += 1
+            self.url_ids[url] = url_id
+            self.new_urls.append((url_id, url))
+        return url_id
+
+    def write(self, data: dict):
+        page_id = self.url_id(data["url"])
+        duplicate_of = data.get("duplicate_of")
+        self.pages.append(
+            (
+                page_id,
+                data["h1"],
+                data["first_paragraph"],
+                self.url_id(duplicate_of) if duplicate_of else None,
+            )
+        )
+        self.links.extend(
+            (page_id, position, self.url_id(url))
+            for position, url in enumerate(data["outgoing_links"])
+        )
+        self.images.extend(
+            (page_id, position, self.url_id(url))
+            for position, url in enumerate(data["image_urls"])
+        )
+        if len(self.pages) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self.conn:
+            self.conn.executemany("INSERT INTO urls VALUES (?, ?)", self.new_urls)
+            if self.append:
+                # a page crawled again on resume replaces its old rows
+                page_ids = [(page[0],) for page in self.pages]
+                self.conn.executemany("DELETE FROM links WHERE page_id = ?", page_ids)
+                self.conn.executemany("DELETE FROM images WHERE page_id = ?", page_ids)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", self.pages
+            )
+            self.conn.executemany("INSERT INTO links VALUES (?, ?, ?)", self.links)
+            self.conn.executemany("INSERT INTO images VALUES (?, ?, ?)", self.images)
+        self.new_urls.clear()
+        self.pages.clear()
+        self.links.clear()
+        self.images.clear()
+
+    def annotate(self, columns: Dict[str, dict]):
+        # per-page metrics computed after the crawl, one row per page url
+        names = list(next(iter(columns.values()), {}))
+        if not names:
+            return
+        rows = [
+            (self.url_id(url), *(page.get(name) for name in names))
+            for url, page in columns.items()
+        ]
+        self.flush()
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS page_metrics")
+            self.conn.execute(
+                "CREATE TABLE page_metrics (url_id INTEGER PRIMARY KEY "
+                "REFERENCES urls (id), " + ", ".join(names) + ")"
+            )
+            placeholders = ", ".join("?" * (len(names) + 1))
+            self.conn.executemany(
+                f"INSERT INTO page_metrics VALUES ({placeholders})", rows
+            )
+
+    def close(self):
+        self.flush()
+        self.conn.executescript(INDEXES)
+        self.conn.close()
+
+
+def write_sqlite_report(page_data: dict, filename: str = "report.db"):
+    writer = SqliteReportWriter(filename)
+    try:
+        for data in page_data.values():
+            if not isinstance(data, Mapping):
+                continue
+            writer.write(data)
+    finally:
+        writer.close()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import unittest
+from collections import Counter
+from http.server import ThreadingHTTPServer
+from crawl import AsyncCrawler
+from test_threaded_crawl import SiteHandler
+
+
+class CountingHandler(SiteHandler):
+    requests = Counter()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        super().do_GET()
+
+
+class TestAsyncCrawler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        cls.host = f"127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        CountingHandler.requests.clear()
+
+    def crawl(self, max_concurrency: int, max_pages: int, **options):
+        async def run():
+            async with AsyncCrawler(
+                self.base_url, max_concurrency, max_pages, **options
+            ) as crawler:
+                return crawler, await crawler.crawl()
+
+        return asyncio.run(asyncio.wait_for(run(), 10))
+
+    def test_each_page_fetched_once(self):
+        crawler, actual = self.crawl(3, 100)
+        # the crawl ends once the frontier drains, page 5 is disallowed
+        expected = {self.host, *(f"{self.host}/{page}" for page in (1, 2, 3, 4))}
+        self.assertSetEqual(set(actual), expected)
+        self.assertEqual(actual[f"{self.host}/2"]["h1"], "Page 2")
+        self.assertEqual(crawler.pages_ok, 5)
+        self.assertDictEqual(
+            dict(CountingHandler.requests),
+            {"/robots.txt": 1, "/": 1, "/1": 1, "/2": 1, "/3": 1, "/4": 1},
+        )
+
+    def test_disallowed_counted_once(self):
+        crawler, _ = self.crawl(3, 100)
+        # page 5 is linked from pages 2 and 4
+        self.assertEqual(crawler.politeness.disallowed, 1)
+
+    def test_max_pages(self):
+        crawler, actual = self.crawl(4, 3)
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(crawler.pages_ok, 3)
+        self.assertTrue(crawler.should_stop)
+        self.assertEqual(sum(CountingHandler.requests.values()), 4)
+
+    def test_failing_report_writer_fails_the_crawl(self):
+        with self.assertRaises(DiskFullError):
+            self.crawl(3, 100, report_writers=[FailingWriter()])
+
+
+class DiskFullError(OSError):
+    pass
+
+
+class FailingWriter:
+    def write(self, data: dict):
+        raise DiskFullError("no space left on device")
+
+    def close(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
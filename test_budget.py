@@ -0,0 +1,57 @@
+import asyncio
+import time
+import unittest
+from budget import CrawlBudget
+
+
+class TestCrawlBudget(unittest.TestCase):
+    def test_unlimited(self):
+        budget = CrawlBudget()
+        budget.start()
+        budget.add_bytes(10**9)
+        self.assertTrue(budget.take_host_page("https://blog.boot.dev/a"))
+        self.assertIsNone(budget.time_left())
+        self.assertFalse(budget.expired())
+        self.assertEqual(budget.summary(), [])
+
+    def test_bytes(self):
+        budget = CrawlBudget(max_bytes=100)
+        budget.add_bytes(60)
+        self.assertFalse(budget.exhausted.is_set())
+        budget.add_bytes(40)
+        self.assertTrue(budget.exhausted.is_set())
+        self.assertEqual(budget.reason, "downloaded 100 bytes, the limit is 100")
+
+    def test_pages_per_host(self):
+        budget = CrawlBudget(max_pages_per_host=2)
+        for _ in range(2):
+            self.assertTrue(budget.take_host_page("https://blog.boot.dev/a"))
+        self.assertTrue(budget.host_full("https://blog.boot.dev/b"))
+        self.assertFalse(budget.take_host_page("https://blog.boot.dev/b"))
+        self.assertTrue(budget.take_host_page("https://boot.dev/"))
+        self.assertEqual(budget.host_skipped, 1)
+        # a full host doesn't end the crawl
+        self.assertFalse(budget.exhausted.is_set())
+
+    def test_deadline(self):
+        budget = CrawlBudget(max_seconds=0.05)
+        budget.start()
+        started = time.monotonic()
+        reason = asyncio.run(budget.wait())
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+        self.assertEqual(reason, "reached the 0.05s time limit")
+        self.assertTrue(budget.expired())
+
+    def test_wait_wakes_on_bytes(self):
+        async def run():
+            budget = CrawlBudget(max_seconds=10, max_bytes=1)
+            budget.start()
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.01, budget.add_bytes, 1)
+            return await budget.wait()
+
+        self.assertEqual(asyncio.run(run()), "downloaded 1 bytes, the limit is 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
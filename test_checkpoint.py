@@ -0,0 +1,110 @@
+import csv
+import os
+import sqlite3
+import tempfile
+import unittest
+from checkpoint import Checkpoint
+from csv_report import CsvReportWriter
+from sqlite_report import SqliteReportWriter
+
+SEED = "https://blog.boot.dev"
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoint.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        checkpoint = Checkpoint(self.path, SEED)
+        checkpoint.add_scheduled("blog.boot.dev", SEED, 0)
+        checkpoint.add_scheduled("blog.boot.dev/a", f"{SEED}/a", 1)
+        checkpoint.add_scheduled("blog.boot.dev/b", f"{SEED}/b", 1)
+        checkpoint.add_scheduled("blog.boot.dev/a/c", f"{SEED}/a/c", 2)
+        checkpoint.add_finished("blog.boot.dev", {"url": SEED, "h1": "Home"})
+        checkpoint.add_finished("blog.boot.dev/b", None)
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.path, SEED, resume=True)
+        page_data, frontier = checkpoint.load()
+        checkpoint.close()
+        self.assertDictEqual(
+            page_data,
+            {"blog.boot.dev": {"url": SEED, "h1": "Home"}, "blog.boot.dev/b": None},
+        )
+        self.assertCountEqual(frontier, [(f"{SEED}/a", 1), (f"{SEED}/a/c", 2)])
+
+    def test_without_resume_starts_over(self):
+        checkpoint = Checkpoint(self.path, SEED)
+        checkpoint.add_finished("blog.boot.dev", None)
+        checkpoint.close()
+        checkpoint = Checkpoint(self.path, SEED)
+        self.assertEqual(checkpoint.load(), ({}, []))
+        checkpoint.close()
+
+    def test_seed_mismatch(self):
+        Checkpoint(self.path, SEED).close()
+        with self.assertRaises(Exception) as context:
+            Checkpoint(self.path, "https://example.com", resume=True)
+        self.assertIn("belongs to a crawl of", str(context.exception))
+
+
+def page(url: str) -> dict:
+    return {
+        "url": url,
+        "h1": "",
+        "first_paragraph": "",
+        "outgoing_links": [],
+        "image_urls": [],
+    }
+
+
+class TestCheckpointReports(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "checkpoint.db")
+        self.csv_path = os.path.join(self.tmp.name, "report.csv")
+        self.db_path = os.path.join(self.tmp.name, "report.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_writers(self, append: bool) -> list:
+        return [
+            CsvReportWriter(self.csv_path, append=append),
+            SqliteReportWriter(self.db_path, append=append),
+        ]
+
+    def test_reports_match_checkpoint_after_crash(self):
+        writers = self.open_writers(append=False)
+        checkpoint = Checkpoint(self.path, SEED, report_writers=writers)
+        for writer in writers:
+            writer.write(page(SEED))
+        checkpoint.add_finished("blog.boot.dev", page(SEED))
+        checkpoint.flush()
+        # written after the last flush, then the crawl is killed
+        writers[0].write(page(f"{SEED}/a"))
+        writers[0].file.write("torn,row")
+        writers[0].file.close()
+        checkpoint.conn.close()
+        writers[1].conn.close()
+
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(
+                conn.execute("SELECT count(*) FROM pages").fetchone(), (1,)
+            )
+        writers = self.open_writers(append=True)
+        checkpoint = Checkpoint(self.path, SEED, resume=True, report_writers=writers)
+        checkpoint.close()
+        for writer in writers:
+            writer.close()
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            rows = [row["page_url"] for row in csv.DictReader(f)]
+        self.assertListEqual(rows, [SEED])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import asyncio
 import unittest
 from crawl import (
+    AsyncCrawler,
     normalize_url,
     get_h1_from_html,
     get_first_paragraph_from_html,
@@ -405,5 +407,35 @@ class TestExtractPageData(unittest.TestCase):
         self.assertDictEqual(actual, expected)
 
 
+class FakeContent:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class FakeResponse:
+    charset = "utf-8"
+
+    def __init__(self, *chunks):
+        self.content = FakeContent(chunks)
+
+
+class TestReadBody(unittest.TestCase):
+    def read_body(self, *chunks):
+        crawler = AsyncCrawler("https://blog.boot.dev", 1, 10, max_page_bytes=4)
+        body = asyncio.run(crawler.read_body(FakeResponse(*chunks)))
+        return body, crawler.truncated_pages
+
+    def test_body_of_exactly_the_cap_is_complete(self):
+        self.assertEqual(self.read_body(b"ab", b"cd"), ((b"abcd", False), 0))
+
+    def test_truncated_once_data_remains(self):
+        self.assertEqual(self.read_body(b"abcd", b"e"), ((b"abcd", True), 1))
+        self.assertEqual(self.read_body(b"abcdef"), ((b"abcd", True), 1))
+
+
 if __name__ == "__main__":
     unittest.main()
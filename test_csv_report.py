@@ -0,0 +1,76 @@
+import csv
+import os
+import tempfile
+import unittest
+from csv_report import CsvReportWriter
+
+PAGES = [
+    {
+        "url": "https://example.com/",
+        "h1": "Home",
+        "first_paragraph": "Welcome",
+        "outgoing_links": ["https://example.com/a", "https://example.com/b"],
+        "image_urls": ["https://example.com/logo.png"],
+    },
+    {
+        "url": "https://example.com/a",
+        "h1": "A",
+        "first_paragraph": "",
+        "outgoing_links": [],
+        "image_urls": [],
+        "duplicate_of": "https://example.com/",
+    },
+]
+
+
+class TestCsvReportWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "report.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_rows_are_written_as_pages_arrive(self):
+        writer = CsvReportWriter(self.path, flush_every=1)
+        writer.write(PAGES[0])
+        rows = self.read()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["page_url"], "https://example.com/")
+        self.assertEqual(
+            rows[0]["outgoing_link_urls"], "https://example.com/a;https://example.com/b"
+        )
+        writer.write(PAGES[1])
+        writer.close()
+        self.assertEqual(self.read()[1]["duplicate_of"], "https://example.com/")
+
+    def test_append_skips_header(self):
+        writer = CsvReportWriter(self.path)
+        writer.write(PAGES[0])
+        writer.close()
+        writer = CsvReportWriter(self.path, append=True)
+        writer.write(PAGES[1])
+        writer.close()
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read().count("page_url"), 1)
+        self.assertEqual([row["h1"] for row in self.read()], ["Home", "A"])
+
+    def test_annotate(self):
+        writer = CsvReportWriter(self.path)
+        writer.write(PAGES[0])
+        writer.annotate({"https://example.com/": {"inlinks": 3}})
+        # rows written after annotating keep the new columns
+        writer.write(PAGES[1])
+        writer.close()
+        rows = self.read()
+        self.assertEqual(rows[0]["inlinks"], "3")
+        self.assertEqual(rows[1]["inlinks"], "")
+        self.assertEqual(rows[1]["h1"], "A")
+
+
+if __name__ == "__main__":
+    unittest.main()
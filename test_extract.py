@@ -0,0 +1,131 @@
+import multiprocessing
+import unittest
+from crawl import extract_page_data_from_bytes, make_parse_executor
+from extract import (
+    FieldExtractor,
+    PageExtractor,
+    extract_fields,
+    register_extractor,
+    unregister_extractor,
+)
+from simhash import text_fingerprint
+
+TEXT = "the quick brown fox jumps over the lazy dog and keeps running"
+
+
+class TitleExtractor(FieldExtractor):
+    field = "title"
+
+    def __init__(self, base_url: str):
+        super().__init__(base_url)
+        self.inside = False
+        self.title = ""
+
+    def start(self, tag, attrs):
+        self.inside = tag == "title"
+
+    def end(self, tag):
+        self.inside = False
+
+    def data(self, text):
+        if self.inside:
+            self.title += text
+
+    def result(self):
+        return self.title
+
+
+class TestExtractFields(unittest.TestCase):
+    def test_single_pass(self):
+        input_url = "https://blog.boot.dev"
+        input_body = """
+            <html><body>
+                <h1>Heading <b>1</b></h1>
+                <p>low priority</p>
+                <main><p>high &amp; priority</p></main>
+                <a href="/about">About</a>
+                <img src="/logo.png"/>
+            </body></html>
+            """
+        actual = extract_fields(input_body, input_url)
+        expected = {
+            "h1": "Heading 1",
+            "first_paragraph": "high & priority",
+            "outgoing_links": ["https://blog.boot.dev/about"],
+            "image_urls": ["https://blog.boot.dev/logo.png"],
+        }
+        self.assertDictEqual(actual, expected)
+
+    def test_skips_script_text(self):
+        input_body = "<p>a<script>var x = 1;</script>b</p>"
+        actual = extract_fields(input_body, "", ["first_paragraph"])
+        self.assertEqual(actual["first_paragraph"], "ab")
+
+    def test_register_extractor(self):
+        register_extractor("title", TitleExtractor)
+        try:
+            input_body = "<html><head><title>Boot.dev</title></head></html>"
+            actual = extract_fields(input_body, "https://blog.boot.dev")
+            self.assertEqual(actual["title"], "Boot.dev")
+            self.assertEqual(actual["h1"], "")
+        finally:
+            unregister_extractor("title")
+
+    def test_registered_extractor_in_process_pool(self):
+        register_extractor("title", TitleExtractor)
+        try:
+            # spawned workers import extract afresh, like forkserver ones
+            context = multiprocessing.get_context("spawn")
+            executor = make_parse_executor("process", 1, context)
+        finally:
+            unregister_extractor("title")
+        with executor:
+            body = b"<html><head><title>Boot.dev</title></head></html>"
+            future = executor.submit(
+                extract_page_data_from_bytes, body, "https://blog.boot.dev"
+            )
+            self.assertEqual(future.result()["title"], "Boot.dev")
+
+    def test_fingerprint_only_when_asked(self):
+        input_body = f"<p>{TEXT}</p><script>ignored()</script>"
+        self.assertNotIn("fingerprint", extract_fields(input_body, ""))
+        actual = extract_fields(input_body, "", ["fingerprint"])
+        self.assertEqual(actual["fingerprint"], text_fingerprint(TEXT))
+
+    def test_no_fingerprint_for_short_text(self):
+        for input_body in ["", "<p>only a few words here</p>"]:
+            actual = extract_fields(input_body, "", ["fingerprint"])
+            self.assertIsNone(actual["fingerprint"])
+
+
+class TestPageExtractorDone(unittest.TestCase):
+    def test_url_limit(self):
+        input_body = "".join(f'<a href="/{i}">{i}</a>' for i in range(10))
+        actual = extract_fields(input_body, "https://blog.boot.dev", url_limit=3)
+        expected = [f"https://blog.boot.dev/{i}" for i in range(3)]
+        self.assertListEqual(actual["outgoing_links"], expected)
+
+    def test_done_after_required_fields(self):
+        parser = PageExtractor("https://blog.boot.dev", url_limit=1)
+        parser.feed("<html><body><h1>Title</h1><main><p>first</p></main>")
+        self.assertFalse(parser.done())
+        parser.feed('<a href="/one">one</a>')
+        self.assertTrue(parser.done())
+
+    def test_not_done_while_main_may_follow(self):
+        parser = PageExtractor("https://blog.boot.dev", url_limit=0)
+        parser.feed("<h1>Title</h1><p>outside main</p>")
+        self.assertFalse(parser.done())
+        parser.feed("<main><div>no paragraph</div></main>")
+        self.assertTrue(parser.done())
+
+    def test_fingerprint_reads_whole_page(self):
+        fields = ["h1", "outgoing_links", "fingerprint"]
+        parser = PageExtractor("https://blog.boot.dev", url_limit=1, fields=fields)
+        parser.feed('<h1>Title</h1><a href="/one">one</a>')
+        # the other fields are final, but the text isn't
+        self.assertFalse(parser.done())
+
+
+if __name__ == "__main__":
+    unittest.main()
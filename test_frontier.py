@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+from frontier import Frontier, parse_priority_rule
+
+
+def drain(frontier: Frontier) -> list:
+    urls = []
+    while not frontier.empty():
+        urls.append(frontier.get_nowait()[0])
+    return urls
+
+
+class TestFrontier(unittest.TestCase):
+    def test_shallow_first(self):
+        frontier = Frontier()
+        frontier.put_nowait("c", 3)
+        frontier.put_nowait("a", 1)
+        frontier.put_nowait("b", 2)
+        self.assertEqual(drain(frontier), ["a", "b", "c"])
+
+    def test_inbound_links_raise_priority(self):
+        frontier = Frontier()
+        frontier.put_nowait("a", 2)
+        frontier.put_nowait("b", 2)
+        for _ in range(3):
+            self.assertTrue(frontier.add_inbound("b"))
+        self.assertFalse(frontier.add_inbound("missing"))
+        self.assertEqual(len(frontier), 2)
+        self.assertEqual(drain(frontier), ["b", "a"])
+
+    def test_bfs_ignores_inbound(self):
+        frontier = Frontier("bfs")
+        frontier.put_nowait("a", 1)
+        frontier.put_nowait("b", 1)
+        frontier.put_nowait("c", 0)
+        frontier.add_inbound("b")
+        self.assertEqual(drain(frontier), ["c", "a", "b"])
+
+    def test_rules(self):
+        frontier = Frontier(rules=[(r"/blog/", 2.0), (r"\?page=", -5.0)])
+        frontier.put_nowait("https://example.com/list?page=2", 1)
+        frontier.put_nowait("https://example.com/about", 1)
+        frontier.put_nowait("https://example.com/blog/post", 2)
+        self.assertEqual(
+            drain(frontier),
+            [
+                "https://example.com/blog/post",
+                "https://example.com/about",
+                "https://example.com/list?page=2",
+            ],
+        )
+
+    def test_join_waits_for_task_done(self):
+        async def run():
+            frontier = Frontier()
+            frontier.put_nowait("a")
+            url, depth = await frontier.get()
+            self.assertEqual((url, depth), ("a", 0))
+            join = asyncio.create_task(frontier.join())
+            await asyncio.sleep(0)
+            self.assertFalse(join.done())
+            frontier.task_done()
+            await asyncio.wait_for(join, 1)
+
+        asyncio.run(run())
+
+    def test_parse_priority_rule(self):
+        self.assertEqual(parse_priority_rule("/a=b/=1.5"), ("/a=b/", 1.5))
+        with self.assertRaises(ValueError):
+            parse_priority_rule("no-boost")
+
+
+if __name__ == "__main__":
+    unittest.main()
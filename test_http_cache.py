@@ -0,0 +1,109 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from crawl import AsyncCrawler
+from http_cache import CacheEntry, HttpCache
+
+RECORD = {"url": "https://blog.boot.dev", "h1": "Home"}
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_needs_a_validator(self):
+        cache = HttpCache(self.path)
+        cache.put("blog.boot.dev", None, None, RECORD)
+        cache.put("blog.boot.dev/a", '"v1"', None, RECORD)
+        cache.close()
+        cache = HttpCache(self.path)
+        self.assertIsNone(cache.get("blog.boot.dev"))
+        self.assertEqual(cache.get("blog.boot.dev/a"), CacheEntry('"v1"', None, RECORD))
+        cache.close()
+
+    def test_conditional_headers(self):
+        date = "Wed, 21 Oct 2015 07:28:00 GMT"
+        self.assertEqual(
+            CacheEntry('"v1"', date, RECORD).conditional_headers(),
+            {"If-None-Match": '"v1"', "If-Modified-Since": date},
+        )
+        self.assertEqual(
+            CacheEntry(None, date, RECORD).conditional_headers(),
+            {"If-Modified-Since": date},
+        )
+        self.assertEqual(CacheEntry(None, None, RECORD).conditional_headers(), {})
+
+
+class EtagHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"<h1>Cached</h1><p>text</p>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRevalidation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), EtagHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_page(self, parse: bool = True):
+        async def run():
+            crawler = AsyncCrawler(
+                self.base_url, 1, 10, cache_path=self.path, obey_robots=False
+            )
+            if not parse:
+
+                async def parse_stream(res, url):
+                    raise AssertionError("revalidated page was parsed")
+
+                crawler.parse_stream = parse_stream
+            async with crawler:
+                data = await crawler.get_page(self.base_url)
+            return data, crawler.cache.hits, crawler.cache.misses
+
+        return asyncio.run(run())
+
+    def test_not_modified_returns_cached_record(self):
+        data, hits, misses = self.get_page()
+        self.assertEqual(data["h1"], "Cached")
+        self.assertEqual((hits, misses), (0, 1))
+        cached, hits, misses = self.get_page(parse=False)
+        self.assertEqual(cached, data)
+        self.assertEqual((hits, misses), (1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
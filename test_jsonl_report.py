@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+from jsonl_report import JsonlReportWriter
+
+PAGES = [
+    {
+        "url": "https://example.com/",
+        "h1": "Café",
+        "first_paragraph": "Welcome",
+        "outgoing_links": ["https://example.com/a"],
+        "image_urls": [],
+    },
+    {
+        "url": "https://example.com/a",
+        "h1": "A",
+        "first_paragraph": "",
+        "outgoing_links": [],
+        "image_urls": [],
+    },
+]
+
+
+class TestJsonlReportWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "report.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_lines_are_written_as_pages_arrive(self):
+        writer = JsonlReportWriter(self.path, flush_every=1)
+        writer.write(PAGES[0])
+        self.assertListEqual(self.read(), PAGES[:1])
+        writer.write(PAGES[1])
+        writer.close()
+        self.assertListEqual(self.read(), PAGES)
+
+    def test_append(self):
+        writer = JsonlReportWriter(self.path)
+        writer.write(PAGES[0])
+        writer.close()
+        writer = JsonlReportWriter(self.path, append=True)
+        writer.write(PAGES[1])
+        writer.close()
+        self.assertListEqual(self.read(), PAGES)
+
+    def test_annotate(self):
+        writer = JsonlReportWriter(self.path)
+        writer.write(PAGES[0])
+        writer.write(PAGES[1])
+        writer.annotate({"https://example.com/a": {"inlinks": 1}})
+        writer.close()
+        self.assertNotIn("inlinks", self.read()[0])
+        self.assertEqual(self.read()[1], dict(PAGES[1], inlinks=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from crawl import AsyncCrawler
+from limiter import HostLimit, parse_retry_after
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+
+    def test_past_date(self):
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_invalid(self):
+        self.assertEqual(parse_retry_after("soon"), 0.0)
+        self.assertEqual(parse_retry_after(None), 0.0)
+
+
+class TestHostLimit(unittest.TestCase):
+    def test_additive_increase(self):
+        host_limit = HostLimit("blog.boot.dev", 2, 1, 8)
+        for _ in range(2):
+            host_limit.on_success(0.1)
+        self.assertEqual(host_limit.limit, 3)
+
+    def test_hold_on_latency_spike(self):
+        host_limit = HostLimit("blog.boot.dev", 2, 1, 8)
+        host_limit.on_success(0.1)
+        host_limit.on_success(5.0)
+        self.assertEqual(host_limit.limit, 2)
+
+    def test_multiplicative_decrease(self):
+        host_limit = HostLimit("blog.boot.dev", 8, 1, 8)
+        host_limit.on_backoff("status 429", retry_after=30)
+        self.assertEqual(host_limit.limit, 4)
+        self.assertGreater(host_limit.blocked_until, 0)
+
+        # a burst of failures from the same overload halves only once
+        host_limit.on_backoff("status 429")
+        self.assertEqual(host_limit.limit, 4)
+
+    def test_max_limit(self):
+        host_limit = HostLimit("blog.boot.dev", 2, 1, 2)
+        for _ in range(10):
+            host_limit.on_success(0.1)
+        self.assertEqual(host_limit.limit, 2)
+
+
+class TestAdaptiveCeiling(unittest.TestCase):
+    def test_rises_above_max_concurrency(self):
+        crawler = AsyncCrawler(
+            "https://blog.boot.dev", 3, 10, adaptive_concurrency=True
+        )
+        self.assertEqual(crawler.workers, 12)
+        host_limit = crawler.limiter.host_limit("https://blog.boot.dev/a")
+        self.assertEqual(host_limit.limit, 3)
+        for _ in range(3 + 4):
+            host_limit.on_success(0.1)
+        self.assertEqual(host_limit.limit, 5)
+
+    def test_explicit_ceiling(self):
+        crawler = AsyncCrawler(
+            "https://blog.boot.dev",
+            3,
+            10,
+            adaptive_concurrency=True,
+            max_adaptive_concurrency=20,
+        )
+        self.assertEqual(crawler.workers, 20)
+        self.assertEqual(crawler.limiter.max_limit, 20)
+        self.assertEqual(AsyncCrawler("https://blog.boot.dev", 3, 10).workers, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+from crawl import AsyncCrawler
+from link_filter import LinkFilter, parse_extensions
+from sitemap import SitemapEntry
+
+BASE = "https://blog.boot.dev"
+
+
+class TestLinkFilter(unittest.TestCase):
+    def test_stages(self):
+        link_filter = LinkFilter(["blog.boot.dev"])
+        links = [
+            f"{BASE}/a",
+            "mailto:lane@boot.dev",
+            "javascript:void(0)",
+            "https://example.com/a",
+            f"{BASE}/guide.PDF",
+            f"{BASE}/a/#top",
+            f"{BASE}/a?page=2",
+            f"{BASE}/b",
+        ]
+        self.assertListEqual(link_filter.filter(links), [f"{BASE}/a", f"{BASE}/b"])
+        expected = {
+            "scheme": 2,
+            "scope": 1,
+            "extension": 1,
+            "deny": 0,
+            "allow": 0,
+            "duplicate": 2,
+        }
+        self.assertDictEqual(link_filter.dropped, expected)
+
+    def test_dedup_is_per_page(self):
+        link_filter = LinkFilter(["blog.boot.dev"])
+        self.assertEqual(link_filter.filter([f"{BASE}/a"]), [f"{BASE}/a"])
+        self.assertEqual(link_filter.filter([f"{BASE}/a"]), [f"{BASE}/a"])
+
+    def test_deny_and_allow(self):
+        link_filter = LinkFilter(
+            ["blog.boot.dev"],
+            deny_patterns=[r"/tag/", r"\?sort="],
+            allow_patterns=[r"/posts?/", r"/tag/"],
+        )
+        links = [f"{BASE}/post/1", f"{BASE}/tag/go", f"{BASE}/posts/?sort=asc", BASE]
+        self.assertListEqual(link_filter.filter(links), [f"{BASE}/post/1"])
+        self.assertEqual(link_filter.dropped["deny"], 2)
+        self.assertEqual(link_filter.dropped["allow"], 1)
+
+    def test_extensions(self):
+        self.assertListEqual(parse_extensions(".PDF, zip,,"), ["pdf", "zip"])
+        link_filter = LinkFilter(["blog.boot.dev"], skip_extensions=[])
+        self.assertEqual(len(link_filter.filter([f"{BASE}/a.pdf"])), 1)
+        self.assertEqual(link_filter.summary(), [])
+
+    def test_summary(self):
+        link_filter = LinkFilter(["blog.boot.dev"])
+        link_filter.filter(["mailto:a@b.c", "https://example.com"])
+        self.assertEqual(
+            link_filter.summary(),
+            ["filtered 2 links before scheduling: 1 scheme, 1 scope"],
+        )
+
+
+class TestSitemapFiltering(unittest.TestCase):
+    def test_sitemap_entries_are_filtered(self):
+        crawler = AsyncCrawler(BASE, 1, 10, deny_patterns=[r"/tag/"])
+        scheduled = []
+
+        async def schedule_from_sitemap(url, lastmod):
+            scheduled.append((url, lastmod))
+            return False
+
+        crawler.schedule_from_sitemap = schedule_from_sitemap
+        entries = [
+            SitemapEntry(f"{BASE}/post/1", "2024-01-01"),
+            SitemapEntry(f"{BASE}/tag/go"),
+            SitemapEntry(f"{BASE}/report.pdf"),
+            SitemapEntry(f"{BASE}/sitemap-2.xml", is_index=True),
+        ]
+        children = []
+        asyncio.run(crawler.schedule_entries(entries, children))
+        self.assertEqual(scheduled, [(f"{BASE}/post/1", "2024-01-01")])
+        self.assertEqual(children, [f"{BASE}/sitemap-2.xml"])
+        self.assertEqual(crawler.link_filter.dropped["deny"], 1)
+        self.assertEqual(crawler.link_filter.dropped["extension"], 1)
+
+    def test_excluded_seed(self):
+        crawler = AsyncCrawler([BASE, f"{BASE}/tag/go"], 1, 10, deny_patterns=["/tag/"])
+        self.assertEqual(crawler.filter_seeds(), [BASE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from array import array
+from link_graph import LinkGraph, build_csr
+
+
+def make_graph() -> LinkGraph:
+    graph = LinkGraph()
+    graph.add_seed("a")
+    graph.add_page("a", "https://a", ["b", "c", "c"])
+    graph.add_page("b", "https://b", ["c", "missing"])
+    graph.add_page("c", "https://c", ["a"])
+    graph.add_page("d", "https://d", ["c"])
+    graph.add_page("missing", None, [], ok=False)
+    return graph
+
+
+class TestBuildCsr(unittest.TestCase):
+    def test_groups_by_key(self):
+        offsets, values = build_csr(
+            3, array("I", [2, 0, 2, 0]), array("I", [10, 11, 12, 13])
+        )
+        self.assertEqual(list(offsets), [0, 2, 2, 4])
+        self.assertEqual(list(values), [11, 13, 10, 12])
+
+
+class TestLinkGraph(unittest.TestCase):
+    def test_duplicate_links_count_once(self):
+        graph = make_graph()
+        self.assertEqual(len(graph.sources), 6)
+        self.assertEqual(graph.inbound_counts()[graph.ids["c"]], 3)
+
+    def test_page_metrics(self):
+        metrics = make_graph().page_metrics()
+        self.assertEqual(
+            set(metrics), {"https://a", "https://b", "https://c", "https://d"}
+        )
+        self.assertEqual(metrics["https://b"]["broken_links"], 1)
+        self.assertEqual(metrics["https://a"]["broken_links"], 0)
+        # d is only reachable some other way, a is a seed
+        self.assertTrue(metrics["https://d"]["orphan"])
+        self.assertFalse(metrics["https://a"]["orphan"])
+        self.assertFalse(metrics["https://c"]["orphan"])
+
+    def test_pagerank(self):
+        graph = LinkGraph()
+        edges = {"0": ["1", "2"], "1": ["2"], "2": ["0"], "3": ["2"]}
+        for page, links in edges.items():
+            graph.add_page(page, page, links)
+        rank = graph.pagerank()
+        self.assertAlmostEqual(sum(rank), 1.0)
+        expected = [0.372527, 0.195824, 0.394149, 0.0375]
+        for actual, value in zip(rank, expected):
+            self.assertAlmostEqual(actual, value, places=5)
+
+    def test_dangling_rank_is_kept(self):
+        graph = make_graph()
+        self.assertAlmostEqual(sum(graph.pagerank()), 1.0)
+
+    def test_empty(self):
+        self.assertEqual(LinkGraph().page_metrics(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from metrics import Histogram, Metrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram([0.1, 1.0, 10.0])
+        for value in [0.05] * 90 + [0.5] * 9 + [5.0]:
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertEqual(histogram.quantile(1.0), 10.0)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.inc("responses_total", labels={"status": "200"})
+        metrics.inc("responses_total", labels={"status": "200"})
+        metrics.add_gauge("in_flight_requests", 1)
+        metrics.observe("ttfb_seconds", 0.002)
+        text = metrics.prometheus()
+        self.assertIn('crawler_responses_total{status="200"} 2', text)
+        self.assertIn("crawler_in_flight_requests 1", text)
+        self.assertIn('crawler_ttfb_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn("crawler_ttfb_seconds_count 1", text)
+
+    def test_summary(self):
+        metrics = Metrics()
+        metrics.inc("pages_total", labels={"result": "ok"})
+        metrics.observe("parse_seconds", 0.02)
+        summary = metrics.summary()
+        self.assertEqual(summary["counters"], {'pages_total{result="ok"}': 1})
+        self.assertEqual(summary["histograms"]["parse_seconds"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from csv_report import write_csv_report
+from jsonl_report import write_jsonl_report
+from page_record import PageRecord, UrlTable
+
+PAGE = {
+    "url": "https://blog.boot.dev/a",
+    "h1": "A",
+    "first_paragraph": "first",
+    "outgoing_links": ["https://blog.boot.dev/", "https://blog.boot.dev/b"],
+    "image_urls": ["https://blog.boot.dev/logo.png"],
+}
+
+
+class TestPageRecord(unittest.TestCase):
+    def test_reads_like_the_dict(self):
+        record = PageRecord.from_dict(UrlTable(), PAGE)
+        self.assertEqual(dict(record), PAGE)
+        self.assertEqual(record["outgoing_links"], PAGE["outgoing_links"])
+        self.assertEqual(record.get("duplicate_of", ""), "")
+        self.assertEqual(len(record), 5)
+
+    def test_urls_interned_across_pages(self):
+        table = UrlTable()
+        other = dict(PAGE, url="https://blog.boot.dev/b")
+        PageRecord.from_dict(table, PAGE)
+        PageRecord.from_dict(table, other)
+        # a, /, b and the logo
+        self.assertEqual(len(table), 4)
+
+    def test_extra_fields(self):
+        record = PageRecord.from_dict(UrlTable(), dict(PAGE, fingerprint=7))
+        record.update({"pagerank": 0.5})
+        self.assertEqual(record["fingerprint"], 7)
+        self.assertEqual(list(record)[-2:], ["fingerprint", "pagerank"])
+        with self.assertRaises(KeyError):
+            record.update({"h1": "B"})
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+    def test_reports_from_records(self):
+        page_data = {
+            "blog.boot.dev/a": PageRecord.from_dict(UrlTable(), PAGE),
+            "blog.boot.dev/c": None,
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            jsonl = os.path.join(tmp, "report.jsonl")
+            write_jsonl_report(page_data, jsonl)
+            with open(jsonl, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line) for line in f], [PAGE])
+            csv_file = os.path.join(tmp, "report.csv")
+            write_csv_report(page_data, csv_file)
+            with open(csv_file, encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+import aiohttp
+from retry import CircuitBreaker, RetryPolicy, StatusError, is_retryable
+
+
+class TestIsRetryable(unittest.TestCase):
+    def test_statuses(self):
+        self.assertTrue(is_retryable(StatusError(503)))
+        self.assertTrue(is_retryable(StatusError(429)))
+        self.assertFalse(is_retryable(StatusError(404)))
+
+    def test_exceptions(self):
+        self.assertTrue(is_retryable(asyncio.TimeoutError()))
+        self.assertTrue(is_retryable(aiohttp.ServerDisconnectedError()))
+        self.assertFalse(is_retryable(Exception("response content-type invalid")))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_bounds(self):
+        policy = RetryPolicy(retries=5, base_delay=1.0, max_delay=4.0)
+        for attempt in range(6):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4.0, 2**attempt))
+
+    def test_retry_after_is_a_floor(self):
+        policy = RetryPolicy(base_delay=0.1)
+        self.assertGreaterEqual(policy.delay(0, retry_after=3.0), 3.0)
+
+    def test_retry_after_is_capped(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=30.0)
+        self.assertEqual(policy.delay(0, retry_after=86400.0), 30.0)
+        self.assertTrue(policy.waits_too_long(86400.0))
+        self.assertFalse(policy.waits_too_long(30.0))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_trip(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=5, reset_timeout=60)
+        breaker.trip()
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.trips, 1)
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_probe_after_reset_timeout(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, "half_open")
+
+        # a failed probe reopens without counting another trip
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.trips, 1)
+
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_one_probe_per_window(self):
+        breaker = CircuitBreaker("example.com", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
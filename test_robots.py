@@ -0,0 +1,128 @@
+import asyncio
+import time
+import unittest
+from contextlib import asynccontextmanager
+from robots import PolitenessScheduler, parse_robots
+
+
+class TestParseRobots(unittest.TestCase):
+    def test_disallow(self):
+        rules = parse_robots("""
+            User-agent: *
+            Disallow: /private
+            """)
+        self.assertFalse(rules.allowed("https://blog.boot.dev/private/page"))
+        self.assertTrue(rules.allowed("https://blog.boot.dev/public"))
+
+    def test_longest_match_wins(self):
+        rules = parse_robots("""
+            User-agent: *
+            Disallow: /docs
+            Allow: /docs/public
+            """)
+        self.assertFalse(rules.allowed("https://blog.boot.dev/docs/secret"))
+        self.assertTrue(rules.allowed("https://blog.boot.dev/docs/public/page"))
+
+    def test_wildcards(self):
+        rules = parse_robots("""
+            User-agent: *
+            Disallow: /*.pdf$
+            Disallow: /*?session=
+            """)
+        self.assertFalse(rules.allowed("https://blog.boot.dev/files/a.pdf"))
+        self.assertTrue(rules.allowed("https://blog.boot.dev/files/a.pdf.html"))
+        self.assertFalse(rules.allowed("https://blog.boot.dev/page?session=1"))
+
+    def test_specific_agent_group(self):
+        rules = parse_robots("""
+            User-agent: *
+            Disallow: /
+
+            User-agent: BootCrawler
+            Disallow: /admin
+            Crawl-delay: 2.5
+            """)
+        self.assertTrue(rules.allowed("https://blog.boot.dev/page"))
+        self.assertFalse(rules.allowed("https://blog.boot.dev/admin"))
+        self.assertEqual(rules.crawl_delay, 2.5)
+
+    def test_empty_disallow_and_sitemaps(self):
+        rules = parse_robots("""
+            Sitemap: https://blog.boot.dev/sitemap.xml
+            User-agent: *
+            Disallow:
+            """)
+        self.assertTrue(rules.allowed("https://blog.boot.dev/anything"))
+        self.assertEqual(rules.sitemaps, ["https://blog.boot.dev/sitemap.xml"])
+
+
+class FakeResponse:
+    status = 200
+    ok = True
+
+    async def text(self, errors="strict"):
+        return "User-agent: *\nDisallow: /private\n"
+
+
+class TestPolitenessScheduler(unittest.TestCase):
+    def test_cancelled_waiter_keeps_the_fetch(self):
+        fetches = []
+
+        @asynccontextmanager
+        async def request(url):
+            fetches.append(url)
+            await asyncio.sleep(0.05)
+            yield FakeResponse()
+
+        async def run():
+            scheduler = PolitenessScheduler(request)
+            url = "https://blog.boot.dev/private"
+            first = asyncio.create_task(scheduler.allowed(url))
+            second = asyncio.create_task(scheduler.allowed(url))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.assertFalse(await second)
+            self.assertTrue(first.cancelled())
+            self.assertFalse(await scheduler.allowed(url))
+            self.assertEqual(scheduler.pending, {})
+
+        asyncio.run(run())
+        self.assertEqual(fetches, ["https://blog.boot.dev/robots.txt"])
+
+    def test_cancelled_fetch_is_retried(self):
+        @asynccontextmanager
+        async def request(url):
+            yield FakeResponse()
+
+        async def run():
+            scheduler = PolitenessScheduler(request)
+            url = "https://blog.boot.dev/"
+            task = asyncio.create_task(scheduler.get_rules(url))
+            await asyncio.sleep(0)
+            scheduler.pending["blog.boot.dev"].cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertNotIn("blog.boot.dev", scheduler.pending)
+            self.assertTrue(await scheduler.allowed(url))
+
+        asyncio.run(run())
+
+    def test_one_bucket_per_host(self):
+        @asynccontextmanager
+        async def request(url):
+            await asyncio.sleep(0.01)
+            yield FakeResponse()
+
+        async def run():
+            scheduler = PolitenessScheduler(request, min_crawl_delay=0.2)
+            url = "https://blog.boot.dev/"
+            started = time.monotonic()
+            # both arrive before the host's rules are known
+            await asyncio.gather(scheduler.wait_turn(url), scheduler.wait_turn(url))
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from seen_set import (
+    BloomSeenSet,
+    DigestSet,
+    ScalableBloomSeenSet,
+    SpillSeenSet,
+    make_seen_set,
+)
+
+
+class TestDigestSet(unittest.TestCase):
+    def test_add(self):
+        seen = DigestSet()
+        self.assertTrue(seen.add("blog.boot.dev/path"))
+        self.assertFalse(seen.add("blog.boot.dev/path"))
+        self.assertIn("blog.boot.dev/path", seen)
+        self.assertNotIn("blog.boot.dev/other", seen)
+        self.assertEqual(len(seen), 1)
+
+    def test_grow(self):
+        seen = DigestSet(capacity=4)
+        urls = [f"blog.boot.dev/{i}" for i in range(5000)]
+        for url in urls:
+            self.assertTrue(seen.add(url))
+        self.assertEqual(len(seen), 5000)
+        self.assertTrue(all(url in seen for url in urls))
+        self.assertLessEqual(seen.memory_bytes(), 5000 * 8 * 4)
+
+
+class TestBloomSeenSet(unittest.TestCase):
+    def test_no_false_negatives(self):
+        seen = BloomSeenSet(capacity=1000, error_rate=0.01)
+        urls = [f"blog.boot.dev/{i}" for i in range(1000)]
+        for url in urls:
+            seen.add(url)
+        self.assertTrue(all(url in seen for url in urls))
+
+    def test_false_positive_rate(self):
+        seen = BloomSeenSet(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            seen.add(f"blog.boot.dev/{i}")
+        false_positives = sum(f"other.dev/{i}" in seen for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestScalableBloomSeenSet(unittest.TestCase):
+    def test_error_rate_holds_past_capacity(self):
+        seen = ScalableBloomSeenSet(capacity=100, error_rate=0.01)
+        urls = [f"blog.boot.dev/{i}" for i in range(1000)]
+        added = sum(seen.add(url) for url in urls)
+        # a false positive while adding skips the url
+        self.assertGreater(added, 980)
+        self.assertEqual(len(seen), added)
+        self.assertGreater(len(seen.filters), 1)
+        self.assertTrue(all(url in seen for url in urls))
+        false_positives = sum(f"other.dev/{i}" in seen for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_make_seen_set(self):
+        self.assertIsInstance(make_seen_set("bloom", 25), ScalableBloomSeenSet)
+
+
+class TestSpillSeenSet(unittest.TestCase):
+    def test_spill(self):
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            seen = SpillSeenSet(path, memory_limit=10)
+            for i in range(25):
+                self.assertTrue(seen.add(f"blog.boot.dev/{i}"))
+            self.assertFalse(seen.add("blog.boot.dev/3"))
+            self.assertIn("blog.boot.dev/24", seen)
+            self.assertEqual(len(seen), 25)
+            self.assertLess(len(seen.memory), 10)
+            seen.close()
+        finally:
+            os.remove(path)
+
+    def test_temp_file_removed_on_close(self):
+        seen = SpillSeenSet(memory_limit=1)
+        seen.add("blog.boot.dev/a")
+        self.assertTrue(os.path.exists(seen.path))
+        seen.close()
+        self.assertFalse(os.path.exists(seen.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from sharded import crawl_sharded, find_dead_shards, shard_for, shard_options
+
+
+class TestShardFor(unittest.TestCase):
+    def test_stable_and_in_range(self):
+        urls = [f"example.com/page/{i}" for i in range(200)]
+        shards = [shard_for(url, 4) for url in urls]
+        self.assertEqual(shards, [shard_for(url, 4) for url in urls])
+        self.assertEqual(set(shards), {0, 1, 2, 3})
+
+    def test_single_shard(self):
+        self.assertEqual(shard_for("example.com/a", 1), 0)
+
+
+class TestShardOptions(unittest.TestCase):
+    def test_paths_are_per_shard(self):
+        options = {"cache_path": "cache.db", "seen_path": None, "seen_set": "disk"}
+        self.assertEqual(
+            shard_options(options, 2),
+            {"cache_path": "cache.db.shard2", "seen_path": None, "seen_set": "disk"},
+        )
+        self.assertEqual(options["cache_path"], "cache.db")
+
+
+class FakeProcess:
+    def __init__(self, alive: bool):
+        self.alive = alive
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+class TestFindDeadShards(unittest.TestCase):
+    def test_dead_after_a_silent_poll(self):
+        processes = [FakeProcess(True), FakeProcess(False), FakeProcess(False)]
+        finished = {2}
+        suspects = set()
+        # the first poll only suspects it, its messages may still be queued
+        self.assertEqual(find_dead_shards(processes, finished, suspects), [])
+        self.assertEqual(suspects, {1})
+        self.assertEqual(find_dead_shards(processes, finished, suspects), [1])
+        self.assertEqual(suspects, set())
+
+
+class TestCrawlSharded(unittest.TestCase):
+    def test_rejects_unsplittable_options(self):
+        for options in (
+            {"max_bytes": 1000},
+            {"max_pages_per_host": 10},
+            {"near_duplicate_distance": 3},
+        ):
+            with self.assertRaises(ValueError):
+                crawl_sharded(["https://blog.boot.dev"], 2, 1, 10, [], **options)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from simhash import SimHashIndex, hamming_distance, shingles, text_fingerprint
+
+TEXT = " ".join(
+    f"word{i % 37} filler{i % 11} text{i % 53} paragraph{i % 7}" for i in range(300)
+)
+
+
+class TestTextFingerprint(unittest.TestCase):
+    def test_identical_text(self):
+        self.assertEqual(text_fingerprint(TEXT), text_fingerprint(TEXT.upper()))
+
+    def test_small_edit_is_close(self):
+        edited = TEXT.replace("word3 ", "session=abc ", 1)
+        distance = hamming_distance(text_fingerprint(TEXT), text_fingerprint(edited))
+        self.assertLessEqual(distance, 3)
+
+    def test_different_text_is_far(self):
+        other = " ".join(f"other{i} content{i * 7}" for i in range(300))
+        distance = hamming_distance(text_fingerprint(TEXT), text_fingerprint(other))
+        self.assertGreater(distance, 10)
+
+    def test_empty(self):
+        self.assertEqual(text_fingerprint(""), 0)
+
+    def test_shingles(self):
+        self.assertEqual(shingles(["a", "b"]), ["a b"])
+        self.assertEqual(shingles(["a", "b", "c", "d"]), ["a b c", "b c d"])
+
+
+class TestSimHashIndex(unittest.TestCase):
+    def test_finds_near_duplicate(self):
+        index = SimHashIndex(distance=3)
+        self.assertIsNone(index.check(0b1011 << 40, "a"))
+        self.assertEqual(index.check((0b1011 << 40) ^ 0b111, "b"), "a")
+        self.assertIsNone(index.check((0b1011 << 40) ^ 0b1111, "c"))
+        self.assertEqual(len(index), 2)
+
+    def test_every_band_is_searched(self):
+        index = SimHashIndex(distance=3)
+        base = (1 << 64) - 1
+        index.add(base, "a")
+        # three flipped bits in three different bands
+        for bits in ((0, 16, 32), (20, 40, 63), (1, 2, 60)):
+            near = base
+            for bit in bits:
+                near ^= 1 << bit
+            self.assertEqual(index.find(near), "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
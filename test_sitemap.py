@@ -0,0 +1,70 @@
+import gzip
+import unittest
+from datetime import datetime, timedelta, timezone
+from sitemap import SitemapParser, lastmod_boost, parse_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/</loc><lastmod>2024-01-02</lastmod></url>
+  <url><loc> https://example.com/about </loc></url>
+  <url><lastmod>2024-01-02</lastmod></url>
+</urlset>
+"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml.gz</loc></sitemap>
+</sitemapindex>
+"""
+
+
+class TestSitemapParser(unittest.TestCase):
+    def test_urlset(self):
+        entries = parse_sitemap(URLSET)
+        self.assertEqual(
+            [(e.url, e.lastmod, e.is_index) for e in entries],
+            [
+                ("https://example.com/", "2024-01-02", False),
+                ("https://example.com/about", None, False),
+            ],
+        )
+
+    def test_index(self):
+        entries = parse_sitemap(INDEX)
+        self.assertEqual(len(entries), 1)
+        self.assertTrue(entries[0].is_index)
+        self.assertEqual(entries[0].url, "https://example.com/sitemap-1.xml.gz")
+
+    def test_gzip_in_small_chunks(self):
+        body = gzip.compress(URLSET)
+        parser = SitemapParser()
+        entries = []
+        for i in range(0, len(body), 7):
+            entries.extend(parser.feed(body[i : i + 7]))
+        entries.extend(parser.close())
+        self.assertEqual(
+            [e.url for e in entries],
+            ["https://example.com/", "https://example.com/about"],
+        )
+
+    def test_entries_are_released(self):
+        parser = SitemapParser()
+        parser.feed(URLSET.replace(b"</urlset>", b""))
+        self.assertEqual(len(parser.root), 0)
+
+
+class TestLastmodBoost(unittest.TestCase):
+    def test_recent_pages_first(self):
+        now = datetime.now(timezone.utc)
+        recent = lastmod_boost((now - timedelta(days=1)).isoformat())
+        old = lastmod_boost((now - timedelta(days=365)).date().isoformat())
+        self.assertGreater(recent, old)
+        self.assertLessEqual(recent, 0.5)
+
+    def test_missing_or_invalid(self):
+        self.assertEqual(lastmod_boost(None), 0.0)
+        self.assertEqual(lastmod_boost("yesterday"), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
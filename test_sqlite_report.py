@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from sqlite_report import SqliteReportWriter
+
+PAGES = [
+    {
+        "url": "https://example.com/",
+        "h1": "Home",
+        "first_paragraph": "Welcome",
+        "outgoing_links": ["https://example.com/a", "https://example.com/b"],
+        "image_urls": ["https://example.com/logo.png"],
+    },
+    {
+        "url": "https://example.com/a",
+        "h1": "A",
+        "first_paragraph": "",
+        "outgoing_links": ["https://example.com/", "https://example.com/b"],
+        "image_urls": ["https://example.com/logo.png"],
+        "duplicate_of": "https://example.com/",
+    },
+]
+
+
+class TestSqliteReportWriter(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def write(self, pages, append=False):
+        writer = SqliteReportWriter(self.path, append=append, batch_size=1)
+        for data in pages:
+            writer.write(data)
+        writer.close()
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_urls_are_interned(self):
+        self.write(PAGES)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM urls"), [(4,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM links"), [(4,)])
+        self.assertEqual(
+            self.query(
+                "SELECT u.url, COUNT(*) FROM links l JOIN urls u ON u.id = l.target_id"
+                " GROUP BY u.url ORDER BY u.url"
+            ),
+            [
+                ("https://example.com/", 1),
+                ("https://example.com/a", 1),
+                ("https://example.com/b", 2),
+            ],
+        )
+
+    def test_pages(self):
+        self.write(PAGES)
+        self.assertEqual(
+            self.query(
+                "SELECT u.url, p.h1, d.url FROM pages p JOIN urls u ON u.id = p.url_id"
+                " LEFT JOIN urls d ON d.id = p.duplicate_of_id ORDER BY u.url"
+            ),
+            [
+                ("https://example.com/", "Home", None),
+                ("https://example.com/a", "A", "https://example.com/"),
+            ],
+        )
+
+    def test_append_replaces_rewritten_pages(self):
+        self.write(PAGES[:1])
+        changed = dict(PAGES[0], outgoing_links=["https://example.com/c"])
+        self.write([changed, PAGES[1]], append=True)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM pages"), [(2,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM links"), [(3,)])
+
+    def test_overwrite(self):
+        self.write(PAGES)
+        self.write(PAGES[:1])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM pages"), [(1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from crawl import ThreadedCrawler, crawl_page, crawl_site
+
+# page number -> linked page numbers
+SITE = {0: [1, 2, 3], 1: [0, 4], 2: [4, 5], 3: [], 4: [5], 5: [0]}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/robots.txt":
+            body = b"User-agent: *\nDisallow: /5\n"
+            content_type = "text/plain"
+        else:
+            page = int(self.path.strip("/") or 0)
+            if page not in SITE:
+                self.send_error(404)
+                return
+            links = "".join(
+                f'<a href="/{link or ""}">{link}</a>' for link in SITE[page]
+            )
+            body = f"<h1>Page {page}</h1><p>text</p>{links}".encode()
+            content_type = "text/html"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestThreadedCrawler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_crawls_every_allowed_page_once(self):
+        actual = crawl_site(self.base_url, 3, 100)
+        host = f"127.0.0.1:{self.server.server_port}"
+        expected = {host, *(f"{host}/{page}" for page in (1, 2, 3, 4))}
+        self.assertSetEqual(set(actual), expected)
+        self.assertEqual(actual[f"{host}/2"]["h1"], "Page 2")
+
+    def test_max_pages(self):
+        crawler = ThreadedCrawler(self.base_url, 4, 3)
+        actual = crawler.crawl()
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(crawler.pages_ok, 3)
+        self.assertTrue(crawler.should_stop)
+
+    def test_breadth_first_with_one_worker(self):
+        actual = list(ThreadedCrawler(self.base_url, 1, 4).crawl())
+        host = f"127.0.0.1:{self.server.server_port}"
+        self.assertListEqual(actual, [host] + [f"{host}/{page}" for page in (1, 2, 3)])
+
+    def test_crawl_page_skips_known_pages(self):
+        host = f"127.0.0.1:{self.server.server_port}"
+        known = {f"{host}/4": None}
+        actual = crawl_page(self.base_url, page_data=known)
+        # robots.txt is not consulted and page 4 is not fetched again
+        self.assertIsNone(actual[f"{host}/4"])
+        self.assertEqual(actual[f"{host}/5"]["h1"], "Page 5")
+        self.assertEqual(len(actual), 6)
+
+    def test_crawl_page_other_domain(self):
+        self.assertEqual(crawl_page(self.base_url, "https://example.com"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import gzip
+import os
+import tempfile
+import unittest
+from reextract import extract_archives
+from warc import WarcWriter, read_warc
+
+HTML = "<h1>Café</h1><p>first</p><a href='/b'>b</a>".encode("latin-1")
+HEADERS = {
+    "Content-Type": "text/html; charset=ISO-8859-1",
+    "Content-Encoding": "gzip",
+    "Content-Length": "999",
+}
+
+
+class TestWarc(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp.name, "crawl.warc.gz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, append: bool = False, pages=(("https://blog.boot.dev/a", 200),)):
+        archive = WarcWriter(self.filename, append=append)
+        for url, status in pages:
+            archive.write_response(url, status, "OK", HEADERS, HTML)
+        archive.close()
+
+    def test_round_trip(self):
+        self.write()
+        [response] = list(read_warc(self.filename))
+        self.assertEqual(response.url, "https://blog.boot.dev/a")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.body, HTML)
+        self.assertEqual(response.charset, "iso-8859-1")
+        # the body is stored decoded, with its real length
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.headers["content-length"], str(len(HTML)))
+
+    def test_one_gzip_member_per_record(self):
+        self.write()
+        with open(self.filename, "rb") as f:
+            data = f.read()
+        # warcinfo and the response
+        self.assertEqual(data.count(b"\x1f\x8b\x08"), 2)
+        self.assertTrue(gzip.decompress(data).startswith(b"WARC/1.1\r\n"))
+
+    def test_append_and_truncated(self):
+        self.write()
+        archive = WarcWriter(self.filename, append=True)
+        archive.write_response("https://blog.boot.dev/b", 200, "OK", {}, b"x", True)
+        archive.close()
+        self.assertEqual(len(list(read_warc(self.filename))), 2)
+        with gzip.open(self.filename) as f:
+            self.assertIn(b"WARC-Truncated: length", f.read())
+
+    def tear(self, pages: int = 3):
+        self.write(pages=[(f"https://blog.boot.dev/{i}", 200) for i in range(pages)])
+        size = os.path.getsize(self.filename)
+        os.truncate(self.filename, size - 20)
+
+    def test_torn_last_record(self):
+        self.tear()
+        actual = [response.url for response in read_warc(self.filename)]
+        self.assertEqual(actual, ["https://blog.boot.dev/0", "https://blog.boot.dev/1"])
+        self.assertEqual(len(list(extract_archives([self.filename], workers=1))), 2)
+
+    def test_append_cuts_torn_record(self):
+        self.tear()
+        self.write(append=True, pages=[("https://blog.boot.dev/3", 200)])
+        actual = [response.url for response in read_warc(self.filename)]
+        expected = [f"https://blog.boot.dev/{i}" for i in (0, 1, 3)]
+        self.assertEqual(actual, expected)
+
+    def test_extract_archives(self):
+        self.write(
+            pages=[
+                ("https://blog.boot.dev/a", 200),
+                ("https://blog.boot.dev/missing", 404),
+                ("https://blog.boot.dev/a/", 200),
+            ]
+        )
+        actual = list(extract_archives([self.filename], workers=1))
+        expected = {
+            "url": "https://blog.boot.dev/a",
+            "h1": "Café",
+            "first_paragraph": "first",
+            "outgoing_links": ["https://blog.boot.dev/b"],
+            "image_urls": [],
+        }
+        self.assertListEqual(actual, [expected])
+
+    def test_extract_near_duplicates(self):
+        text = "the quick brown fox jumps over the lazy dog and keeps on running"
+        archive = WarcWriter(self.filename)
+        for url, paragraph in (("a", text), ("b", text), ("c", text[::-1])):
+            body = f"<h1>Title</h1><p>{paragraph}</p>"
+            archive.write_response(
+                f"https://blog.boot.dev/{url}", 200, "OK", HEADERS, body.encode()
+            )
+        archive.close()
+        actual = list(extract_archives([self.filename], 1, near_duplicate_distance=3))
+        self.assertNotIn("duplicate_of", actual[0])
+        self.assertEqual(actual[1]["duplicate_of"], "https://blog.boot.dev/a")
+        self.assertNotIn("duplicate_of", actual[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,8 @@
+from urllib.parse import urlparse
+
+
+def normalize_url(url: str) -> str:
+    result = urlparse(url)
+    joined = result.netloc + result.path
+    normalized = joined.rstrip("/").lower()
+    return normalized
@@ -0,0 +1,212 @@
+import gzip
+import io
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.message import Message
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+WARC_VERSION = "WARC/1.1"
+GZIP_MAGIC = b"\x1f\x8b"
+READ_SIZE = 64 * 1024
+# the stored body is the one aiohttp handed us: already decompressed and
+# de-chunked, so the headers describing the wire encoding no longer apply
+WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+@dataclass
+class WarcResponse:
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "")
+
+    @property
+    def charset(self) -> Optional[str]:
+        message = Message()
+        message["content-type"] = self.content_type
+        return message.get_content_charset()
+
+
+def warc_date() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class WarcWriter:
+    # WARC-style archive of raw page responses. every record is its own gzip
+    # member, so the file stays readable up to the last whole record if the
+    # crawl dies and a resumed crawl can append once the torn tail is cut off
+    def __init__(self, filename: str, append: bool = False, compresslevel: int = 6):
+        self.filename = filename
+        self.compresslevel = compresslevel
+        if append and os.path.exists(filename):
+            length = readable_length(filename)
+            if length < os.path.getsize(filename):
+                print(f"dropping a torn record at the end of {filename}")
+                os.truncate(filename, length)
+        self.file = open(filename, "ab" if append else "wb")
+        self.responses = 0
+        self.write_record(
+            "warcinfo",
+            None,
+            b"software: spider-crawler\r\nformat: WARC File Format 1.1\r\n",
+            "application/warc-fields",
+        )
+
+    def write_record(
+        self,
+        warc_type: str,
+        url: Optional[str],
+        block: bytes,
+        content_type: str,
+        extra: Optional[Dict[str, str]] = None,
+    ):
+        headers = {
+            "WARC-Type": warc_type,
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "WARC-Date": warc_date(),
+        }
+        if url:
+            headers["WARC-Target-URI"] = url
+        headers.update(extra or {})
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(block))
+        head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        record = f"{WARC_VERSION}\r\n{head}\r\n".encode() + block + b"\r\n\r\n"
+        self.file.write(gzip.compress(record, self.compresslevel))
+
+    def write_response(
+        self,
+        url: str,
+        status: int,
+        reason: Optional[str],
+        headers,
+        body: bytes,
+        truncated: bool = False,
+    ):
+        lines = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+        lines.extend(
+            f"{name}: {value}"
+            for name, value in headers.items()
+            if name.lower() not in WIRE_HEADERS
+        )
+        lines.append(f"Content-Length: {len(body)}")
+        head = "\r\n".join(lines) + "\r\n\r\n"
+        block = head.encode("utf-8", "surrogateescape") + body
+        # bodies cut at max_page_bytes are marked the way WARC readers expect
+        extra = {"WARC-Truncated": "length"} if truncated else None
+        self.write_record(
+            "response", url, block, "application/http;msgtype=response", extra
+        )
+        self.responses += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_headers(file: BinaryIO) -> Optional[Dict[str, str]]:
+    # None when the archive ends inside the header
+    headers = {}
+    while True:
+        line = file.readline()
+        if not line:
+            return None
+        if line in (b"\r\n", b"\n"):
+            return headers
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+def parse_http_response(url: str, block: bytes) -> WarcResponse:
+    head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *lines = head.decode("utf-8", "replace").split("\r\n")
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return WarcResponse(url, int(status_line.split()[1]), headers, body)
+
+
+def gzip_members(file: BinaryIO) -> Iterator[Tuple[bytes, int]]:
+    # decompresses one gzip member at a time, with the offset it ends at.
+    # stops at a member cut short by a crash instead of raising
+    offset = 0
+    data = b""
+    while True:
+        decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        parts = []
+        consumed = 0
+        while not decompressor.eof:
+            if not data:
+                data = file.read(READ_SIZE)
+                if not data:
+                    return
+            try:
+                parts.append(decompressor.decompress(data))
+            except zlib.error:
+                return
+            consumed += len(data) - len(decompressor.unused_data)
+            data = decompressor.unused_data
+        offset += consumed
+        yield b"".join(parts), offset
+
+
+def is_gzipped(filename: str) -> bool:
+    with open(filename, "rb") as raw:
+        return raw.read(2) == GZIP_MAGIC
+
+
+def readable_length(filename: str) -> int:
+    # bytes up to the end of the last whole record
+    if not is_gzipped(filename):
+        return os.path.getsize(filename)
+    length = 0
+    with open(filename, "rb") as file:
+        for _, length in gzip_members(file):
+            pass
+    return length
+
+
+def read_records(file: BinaryIO, filename: str) -> Iterator[WarcResponse]:
+    # response records of an uncompressed stream, up to the last whole one
+    while True:
+        line = file.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+        if not line.startswith(b"WARC/"):
+            raise ValueError(f"not a WARC record in {filename}: {line[:40]!r}")
+        headers = read_headers(file)
+        if headers is None:
+            return
+        length = int(headers.get("content-length", 0))
+        block = file.read(length)
+        if len(block) < length:
+            return
+        if headers.get("warc-type") == "response" and headers.get(
+            "content-type", ""
+        ).startswith("application/http"):
+            yield parse_http_response(headers["warc-target-uri"], block)
+
+
+def read_warc(filename: str) -> Iterator[WarcResponse]:
+    # yields the response records of a .warc or .warc.gz file in order. an
+    # archive torn by a crash is read up to its last whole record
+    if not is_gzipped(filename):
+        with open(filename, "rb") as file:
+            yield from read_records(file, filename)
+        return
+
+    length = 0
+    with open(filename, "rb") as file:
+        for member, length in gzip_members(file):
+            yield from read_records(io.BytesIO(member), filename)
+    if length < os.path.getsize(filename):
+        print(f"{filename} ends in a torn record, read up to byte {length}")